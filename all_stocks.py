@@ -1,33 +1,27 @@
-import json
-import yfinance as yf
 import pandas as pd
-import time
-
-# Load the JSON data
-with open("vt.json", "r") as file:
-    data = json.load(file)
-
-# Extract the first 5 holdings from the data
-holdings = data.get("holding", [])
-
-# Prepare lists to store tickers and market caps
-tickers_list = []
-
-# Loop through each holding and create a Ticker object using ISIN
-for holding in holdings:
-    isin = holding.get("isin")
-    
-    if isin:  # Ensure ISIN is available
-        ticker_yahoo = yf.Ticker(isin)  # Create the Ticker object for ISIN
-        
-        # Append ticker and market cap to the lists
-        tickers_list.append(ticker_yahoo.ticker)
-        
-    time.sleep(1)  # Sleep to avoid hitting rate limits
-
-# Create a DataFrame to store the tickers and market caps
+
+from holdings import load_holdings
+from isin_resolver import IsinResolver
+
+# Lookup settings: requests per second to Yahoo and concurrent lookups
+rate = 2.0
+workers = 8
+
+# Load the holdings (columnar, cached after the first parse of vt.json)
+holdings = load_holdings("vt.json")
+
+# Resolve every holding's Yahoo ticker: holdings whose own ticker and exchange
+# already give it are used directly, earlier lookups come from the local
+# cache, and only the rest are looked up concurrently under the rate limit
+resolved = IsinResolver(rate=rate, workers=workers).resolve_holdings(holdings, progress=True)
+
+unresolved = resolved["symbol"].isna().sum()
+if unresolved:
+    print(f"Could not resolve {unresolved} ISIN(s); they will be retried on a later run")
+
+# Create a DataFrame to store the tickers
 df = pd.DataFrame({
-    "Ticker": tickers_list,
+    "Ticker": resolved["symbol"].dropna(),
 })
 
 # Save the data to a CSV file
@@ -1,42 +1,36 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-import statsmodels.api as sm
 import datetime
 
+from market_data import get_prices
+from rolling import rolling_ols
+from universe import universe_betas
+
 # Define the time range
 start = datetime.datetime(2020, 1, 1)
 end = datetime.datetime(2025, 1, 1)
 
-# Download data for VTI, VXUS, and VT using yfinance
+# Load data for VTI, VXUS, and VT (auto_adjust=True, so Close is adjusted; cached locally)
 tickers = ['VTI', 'VXUS', 'VT']
-data = yf.download(tickers, start=start, end=end)
-
-# Access the 'Close' prices using multi-level columns (auto_adjust=True, so Close is adjusted)
-close_data = data['Close']
+close_data = get_prices(tickers, start=start, end=end)
 
 # Calculate daily returns
 returns = close_data.pct_change().dropna()
 print(returns.head())  # Print first few rows to check the data
 
-# Perform regression for VTI against VT
-X = returns['VT']  # Independent variable (Benchmark ETF)
-X = sm.add_constant(X)  # Adds a constant (alpha term) to the regression
-y_vti = returns['VTI']  # Dependent variable (VTI ETF)
-model_vti = sm.OLS(y_vti, X).fit()
-
-# Perform regression for VXUS against VT
-y_vxus = returns['VXUS']  # Dependent variable (VXUS ETF)
-model_vxus = sm.OLS(y_vxus, X).fit()
-
-# Extract the betas (coefficients) from the models
-beta_vti = model_vti.params[1]  # The second parameter is the beta
-beta_vxus = model_vxus.params[1]
+# Betas of VTI and VXUS against VT (cov / var) in one matrix pass
+betas = universe_betas(returns[['VTI', 'VXUS']], returns['VT'])
+beta_vti = betas.loc['VTI', 'beta']
+beta_vxus = betas.loc['VXUS', 'beta']
 
 # Print the results
 print(f"Beta of VTI relative to VT: {beta_vti}")
 print(f"Beta of VXUS relative to VT: {beta_vxus}")
 
+# Rolling 252-day betas, all windows in one pass
+for ticker in ['VTI', 'VXUS']:
+    rolling_beta = rolling_ols(returns[ticker], returns['VT'], window=252)['VT']
+    print(f"Rolling 252-day beta of {ticker}: latest {rolling_beta.iloc[-1]:.3f}, "
+          f"range {rolling_beta.min():.3f} to {rolling_beta.max():.3f}")
+
 # Given data
 return_vti = 0.0888  # VTI return (8.88%)
 
@@ -5,9 +5,21 @@ Takes a weighted portfolio of stocks/ETFs, downloads historical returns,
 runs both a single-factor CAPM and a Fama-French 5-factor regression,
 and reports alpha, factor loadings, and related statistics.
 
+Batch mode (``--batch FILE``) scores many portfolios in one run: prices for
+the union of their tickers are downloaded once, the factor table is loaded
+once, and every CAPM and Fama-French regression is solved together as a
+single least-squares problem with one column per portfolio.  All portfolios
+share the sample window on which every ticker has data.  Each line of the
+batch file is one portfolio, optionally preceded by a name:
+
+    value_tilt  AVUV:0.40 VT:0.35 AVDV:0.25
+    AVUV:0.50 VT:0.50
+
 Usage:
     python capm_alpha.py AVUV:0.40 VT:0.35 AVDV:0.25
     python capm_alpha.py AVUV:0.40 VT:0.35 AVDV:0.25 --period max --factors 3
+    python capm_alpha.py AVUV:0.40 VT:0.60 --period max --rolling 36 --rolling-out rolling.csv
+    python capm_alpha.py --batch portfolios.txt --out alphas.csv
 """
 
 import argparse
@@ -16,7 +28,11 @@ import sys
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
-import yfinance as yf
+from scipy import stats
+
+from ff_factors import REGIONS, get_factors
+from market_data import get_prices
+from rolling import rolling_ols
 
 
 def parse_portfolio(holdings: list[str]) -> dict[str, float]:
@@ -36,19 +52,40 @@ def parse_portfolio(holdings: list[str]) -> dict[str, float]:
     return portfolio
 
 
+def read_portfolio_file(path: str) -> dict[str, dict[str, float]]:
+    """
+    Read one portfolio per line ('[NAME] TICKER:WEIGHT ...').  Blank lines
+    and lines starting with '#' are skipped; unnamed portfolios are named
+    after their line number.
+    """
+    portfolios = {}
+    with open(path) as f:
+        for lineno, line in enumerate(f, start=1):
+            tokens = line.split("#", 1)[0].replace(",", " ").split()
+            if not tokens:
+                continue
+            name = f"line_{lineno}"
+            if ":" not in tokens[0]:
+                name, tokens = tokens[0], tokens[1:]
+            if name in portfolios:
+                sys.exit(f"Error: duplicate portfolio name '{name}' on line {lineno} of {path}")
+            if not tokens:
+                sys.exit(f"Error: portfolio '{name}' on line {lineno} of {path} has no holdings")
+            portfolios[name] = parse_portfolio(tokens)
+
+    if not portfolios:
+        sys.exit(f"Error: no portfolios found in {path}")
+    return portfolios
+
+
 def fetch_prices(tickers: list[str], period: str, interval: str) -> pd.DataFrame:
     """Download adjusted close prices for portfolio tickers."""
     print(f"Downloading price data for {', '.join(tickers)}  (period={period}, interval={interval}) ...")
-    data = yf.download(tickers, period=period, interval=interval, auto_adjust=True)
+    prices = get_prices(tickers, period=period, interval=interval, auto_adjust=True)
 
-    if data.empty:
+    if prices.empty:
         sys.exit("Error: no data returned from Yahoo Finance.")
 
-    if isinstance(data.columns, pd.MultiIndex):
-        prices = data["Close"]
-    else:
-        prices = data[["Close"]].rename(columns={"Close": tickers[0]})
-
     prices = prices.dropna()
 
     missing = [t for t in tickers if t not in prices.columns]
@@ -63,47 +100,10 @@ def compute_returns(prices: pd.DataFrame) -> pd.DataFrame:
     return prices.pct_change().dropna()
 
 
-def fetch_ff_factors(num_factors: int, start_date: str) -> pd.DataFrame:
-    """Download global Fama-French factor data from Kenneth French's data library."""
-    import io
-    import urllib.request
-    import zipfile
-
-    dataset = {
-        3: "Developed_3_Factors",
-        5: "Developed_5_Factors",
-    }[num_factors]
-
-    print(f"Downloading Fama-French {num_factors}-factor (global) data ...")
-    url = f"https://mba.tuck.dartmouth.edu/pages/faculty/ken.french/ftp/{dataset}_CSV.zip"
-    resp = urllib.request.urlopen(url)
-    z = zipfile.ZipFile(io.BytesIO(resp.read()))
-    csv_name = [n for n in z.namelist() if n.endswith(".csv")][0]
-
-    with z.open(csv_name) as f:
-        raw = f.read().decode("utf-8")
-
-    # Find the header line and extract the monthly data (stop at annual section)
-    lines = raw.split("\n")
-    header_idx = next(i for i, line in enumerate(lines) if "Mkt-RF" in line)
-    data_lines = [lines[header_idx]]
-    for line in lines[header_idx + 1 :]:
-        stripped = line.strip()
-        if not stripped or not stripped[0].isdigit():
-            break
-        data_lines.append(line)
-
-    ff = pd.read_csv(io.StringIO("\n".join(data_lines)), index_col=0)
-    ff.index = ff.index.astype(str).str.strip()
-    ff.index = pd.to_datetime(ff.index, format="%Y%m") + pd.offsets.MonthEnd(0)
-
-    # Filter to start_date
-    ff = ff[ff.index >= pd.to_datetime(start_date)]
-
-    # Returns come in percent — convert to decimal
-    ff = ff / 100.0
-
-    return ff
+def fetch_ff_factors(num_factors: int, start_date: str, region: str = "Developed",
+                     zip_path: str = None) -> pd.DataFrame:
+    """Monthly Fama-French factors (decimal) for ``region`` from the local factor store."""
+    return get_factors(region, num_factors, start=start_date, zip_path=zip_path)
 
 
 def run_capm(portfolio_returns: pd.Series, market_returns: pd.Series, rf_rate: float, periods_per_year: int):
@@ -165,6 +165,137 @@ def run_fama_french(portfolio_returns: pd.Series, ff_factors: pd.DataFrame, peri
     }
 
 
+def rolling_capm(portfolio_returns: pd.Series, market_returns: pd.Series, rf_rate: float,
+                 periods_per_year: int, window: int) -> pd.DataFrame:
+    """CAPM alpha (per period and annualized), beta and R² over every trailing ``window``."""
+    rf_per_period = (1 + rf_rate) ** (1 / periods_per_year) - 1
+    fits = rolling_ols(portfolio_returns - rf_per_period, (market_returns - rf_per_period).rename("beta"), window)
+    fits = fits.rename(columns={"const": "alpha_per_period"})
+    fits.insert(1, "alpha_annualized", (1 + fits["alpha_per_period"]) ** periods_per_year - 1)
+    return fits
+
+
+def rolling_fama_french(portfolio_returns: pd.Series, ff_factors: pd.DataFrame, periods_per_year: int,
+                        window: int) -> pd.DataFrame:
+    """Fama-French alpha, factor loadings and R² over every trailing ``window`` months."""
+    port = portfolio_returns.copy()
+    port.index = port.index.to_period("M").to_timestamp("M")
+    ff = ff_factors.copy()
+    ff.index = ff.index.to_period("M").to_timestamp("M")
+
+    combined = pd.concat([port.rename("__port__"), ff], axis=1, join="inner").dropna()
+    factor_cols = [c for c in ff.columns if c != "RF"]
+    fits = rolling_ols(combined["__port__"] - combined["RF"], combined[factor_cols], window)
+    fits = fits.rename(columns={"const": "alpha_per_period"})
+    fits.insert(1, "alpha_annualized", (1 + fits["alpha_per_period"]) ** periods_per_year - 1)
+    return fits
+
+
+def print_rolling(name: str, fits: pd.DataFrame, window: int):
+    print("\n" + "-" * 60)
+    print(f"  Rolling {name} ({window}-period window, {len(fits)} windows)")
+    print("-" * 60)
+    if fits.empty:
+        print("  Not enough observations for one full window.")
+        return
+    columns = [c for c in fits.columns if c != "alpha_per_period"]
+    print(f"  {'':18s}{'latest':>10s}{'min':>10s}{'max':>10s}")
+    for col in columns:
+        series = fits[col]
+        print(f"  {col:18s}{series.iloc[-1]:>10.3f}{series.min():>10.3f}{series.max():>10.3f}")
+
+
+def stacked_ols(X: np.ndarray, Y: np.ndarray) -> dict:
+    """
+    OLS of every column of ``Y`` (n x p) on the same regressors ``X``
+    (n x k, constant included) in one ``lstsq`` solve.  Returns (k x p)
+    params, standard errors and two-sided p-values, and per-column R².
+    """
+    n, k = X.shape
+    params, _, rank, _ = np.linalg.lstsq(X, Y, rcond=None)
+    resid = Y - X @ params
+    dof = n - rank
+
+    sigma2 = (resid**2).sum(axis=0) / dof
+    xtx_inv_diag = np.diag(np.linalg.pinv(X.T @ X))
+    std_errors = np.sqrt(np.outer(xtx_inv_diag, sigma2))
+    pvalues = 2 * stats.t.sf(np.abs(params / std_errors), dof)
+
+    centered = Y - Y.mean(axis=0)
+    r_squared = 1 - (resid**2).sum(axis=0) / (centered**2).sum(axis=0)
+
+    return {"params": params, "std_errors": std_errors, "pvalues": pvalues, "r_squared": r_squared, "n_obs": n}
+
+
+def run_batch(portfolio_returns: pd.DataFrame, market_returns: pd.Series, ff_factors: pd.DataFrame,
+              rf_rate: float, periods_per_year: int) -> pd.DataFrame:
+    """
+    CAPM and Fama-French regressions for every column of ``portfolio_returns``
+    at once.  Returns one row per portfolio with annualized alphas, loadings,
+    p-values and R².
+    """
+    # CAPM:  R_p - R_f = alpha + beta * (R_m - R_f)
+    rf_per_period = (1 + rf_rate) ** (1 / periods_per_year) - 1
+    X = np.column_stack([np.ones(len(market_returns)), market_returns.to_numpy() - rf_per_period])
+    capm = stacked_ols(X, portfolio_returns.to_numpy() - rf_per_period)
+
+    # Fama-French:  R_p - R_f = alpha + b' factors, on the months both tables cover
+    port = portfolio_returns.copy()
+    port.index = port.index.to_period("M").to_timestamp("M")
+    ff = ff_factors.copy()
+    ff.index = ff.index.to_period("M").to_timestamp("M")
+    # Keyed so a portfolio named "RF" or after a factor cannot collide with the factor columns
+    combined = pd.concat({"port": port, "ff": ff}, axis=1, join="inner").dropna()
+    factor_cols = [c for c in ff.columns if c != "RF"]
+    X = np.column_stack([np.ones(len(combined)), combined["ff"][factor_cols].to_numpy()])
+    Y = combined["port"].to_numpy() - combined["ff"][["RF"]].to_numpy()
+    ff_fit = stacked_ols(X, Y)
+
+    results = pd.DataFrame(index=portfolio_returns.columns)
+    results.index.name = "portfolio"
+    results["ann_return"] = (1 + portfolio_returns.mean()) ** periods_per_year - 1
+    results["capm_alpha"] = (1 + capm["params"][0]) ** periods_per_year - 1
+    results["capm_alpha_pvalue"] = capm["pvalues"][0]
+    results["capm_beta"] = capm["params"][1]
+    results["capm_r_squared"] = capm["r_squared"]
+    results["ff_alpha"] = (1 + ff_fit["params"][0]) ** periods_per_year - 1
+    results["ff_alpha_pvalue"] = ff_fit["pvalues"][0]
+    for i, factor in enumerate(factor_cols, start=1):
+        results[factor] = ff_fit["params"][i]
+        results[f"{factor}_pvalue"] = ff_fit["pvalues"][i]
+    results["ff_r_squared"] = ff_fit["r_squared"]
+    results["n_obs"] = ff_fit["n_obs"]
+    return results
+
+
+def batch_main(args, periods: int):
+    portfolios = read_portfolio_file(args.batch)
+    tickers = sorted({t for portfolio in portfolios.values() for t in portfolio} | {args.benchmark})
+    print(f"Scoring {len(portfolios)} portfolios over {len(tickers)} tickers ...")
+
+    prices = fetch_prices(tickers, args.period, args.interval)
+    returns = compute_returns(prices)
+
+    # Weight matrix (tickers x portfolios): all portfolio returns in one product
+    weights = pd.DataFrame(portfolios).reindex(returns.columns).fillna(0.0)
+    portfolio_returns = returns @ weights
+
+    start_date = returns.index.min().strftime("%Y-%m-%d")
+    ff_factors = fetch_ff_factors(args.factors, start_date, args.ff_region, args.ff_zip)
+    results = run_batch(portfolio_returns, returns[args.benchmark], ff_factors, args.rf, periods)
+
+    if args.out and args.out.lower().endswith(".json"):
+        results.reset_index().to_json(args.out, orient="records", indent=2)
+    elif args.out:
+        results.to_csv(args.out)
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", 200,
+                               "display.float_format", "{:,.4f}".format):
+            print(results.to_string())
+    if args.out:
+        print(f"Results for {len(results)} portfolios saved to {args.out}")
+
+
 def periods_per_year_from_interval(interval: str) -> int:
     mapping = {"1d": 252, "1wk": 52, "1mo": 12, "3mo": 4}
     if interval not in mapping:
@@ -177,20 +308,37 @@ def main():
         description="Calculate CAPM & Fama-French alpha for a weighted portfolio.",
         epilog="Example:  python capm_alpha.py AVUV:0.40 VT:0.35 AVDV:0.25",
     )
-    parser.add_argument("holdings", nargs="+", help="TICKER:WEIGHT pairs (e.g. AAPL:0.40)")
+    parser.add_argument("holdings", nargs="*", help="TICKER:WEIGHT pairs (e.g. AAPL:0.40)")
+    parser.add_argument("--batch", help="File with one portfolio per line ('[NAME] TICKER:WEIGHT ...')")
+    parser.add_argument("--out", help="Batch mode: write results to this .csv or .json file")
     parser.add_argument("--benchmark", default="VT", help="Market benchmark for CAPM (default: VT)")
     parser.add_argument("--period", default="5y", help="Historical look-back period (default: 5y)")
     parser.add_argument("--interval", default="1mo", help="Return interval: 1d, 1wk, 1mo, 3mo (default: 1mo)")
     parser.add_argument("--rf", type=float, default=0.043, help="Annual risk-free rate for CAPM (default: 0.043)")
     parser.add_argument("--factors", type=int, default=5, choices=[3, 5], help="Fama-French 3 or 5 factors (default: 5)")
+    parser.add_argument("--ff-region", default="Developed", choices=REGIONS,
+                        help="Fama-French factor region (default: Developed)")
+    parser.add_argument("--rolling", type=int, metavar="WINDOW",
+                        help="Also fit rolling CAPM/FF regressions over WINDOW periods (e.g. 36 or 60)")
+    parser.add_argument("--rolling-out", help="Write the rolling CAPM and FF series to this CSV file")
+    parser.add_argument("--ff-zip", help="Read factors from a local library *_CSV.zip instead of the cache/network")
     args = parser.parse_args()
 
     if args.interval != "1mo":
         sys.exit("Error: Fama-French data is monthly only. Use --interval 1mo (the default).")
+    if bool(args.batch) == bool(args.holdings):
+        parser.error("give either TICKER:WEIGHT holdings or --batch FILE")
+    if args.batch and (args.rolling or args.rolling_out):
+        parser.error("--rolling and --rolling-out are not supported with --batch")
+
+    periods = periods_per_year_from_interval(args.interval)
+
+    if args.batch:
+        batch_main(args, periods)
+        return
 
     portfolio = parse_portfolio(args.holdings)
     tickers = list(portfolio.keys())
-    periods = periods_per_year_from_interval(args.interval)
 
     # Fetch prices for all tickers + benchmark
     all_tickers = list(set(tickers + [args.benchmark]))
@@ -208,7 +356,7 @@ def main():
 
     # ── Fama-French ──
     start_date = returns.index.min().strftime("%Y-%m-%d")
-    ff_factors = fetch_ff_factors(args.factors, start_date)
+    ff_factors = fetch_ff_factors(args.factors, start_date, args.ff_region, args.ff_zip)
     ff = run_fama_french(portfolio_returns, ff_factors, periods)
 
     # ── Report ──
@@ -260,6 +408,17 @@ def main():
     print(f"\n--- Fama-French {args.factors}-Factor OLS Summary ---")
     print(ff["model"].summary())
 
+    if args.rolling:
+        rolling_capm_fits = rolling_capm(portfolio_returns, market_returns, args.rf, periods, args.rolling)
+        rolling_ff_fits = rolling_fama_french(portfolio_returns, ff_factors, periods, args.rolling)
+        print_rolling("CAPM", rolling_capm_fits, args.rolling)
+        print_rolling(f"Fama-French {args.factors}-Factor", rolling_ff_fits, args.rolling)
+        if args.rolling_out:
+            rolling_capm_fits.index = rolling_capm_fits.index.to_period("M").to_timestamp("M")
+            combined = pd.concat([rolling_capm_fits.add_prefix("capm_"), rolling_ff_fits.add_prefix("ff_")], axis=1)
+            combined.to_csv(args.rolling_out)
+            print(f"\nRolling series saved to {args.rolling_out}")
+
 
 if __name__ == "__main__":
     main()
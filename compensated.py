@@ -1,9 +1,9 @@
-import yfinance as yf
-import pandas as pd
 import numpy as np
 import statsmodels.api as sm
 import datetime
 
+from market_data import DataPlan
+
 # Define the time range
 start = datetime.datetime(1925, 1, 1)
 end = datetime.datetime(2025, 3, 7)
@@ -11,12 +11,11 @@ end = datetime.datetime(2025, 3, 7)
 # Take input for the stock ticker
 stock_ticker = input("Enter the stock ticker (e.g., 'AAPL', 'MSFT', etc.): ").upper()
 
-# Download data for the user-defined stock and VT using yfinance
+# Load data for the user-defined stock and VT in one batched, cached fetch;
+# the regression and the volatility calculations below both use it
 tickers = [stock_ticker, 'VT']
-data = yf.download(tickers, start=start, end=end)
-
-# Access the 'Close' prices using multi-level columns
-close_data = data['Close'].dropna(how="all")  # Drop rows where all tickers have NaN
+data = DataPlan().add_prices("close", tickers, start=start, end=end).fetch()
+close_data = data["close"].dropna(how="all")  # Drop rows where all tickers have NaN
 
 # Calculate daily returns
 returns = close_data.pct_change().dropna()
@@ -35,8 +34,8 @@ print(f"Beta of {stock_ticker} relative to VT: {beta_stock}")
 
 # Loop through each ticker in the list
 for ticker in tickers:
-     # Download historical data for the stock (adjusted close prices)
-    stock_data = yf.download(ticker, start, end)
+    # Historical adjusted close prices for the stock, from the shared fetch
+    stock_data = data["close"][[ticker]].dropna().rename(columns={ticker: 'Close'})
 
     # Calculate daily returns
     stock_data['Daily Returns'] = stock_data['Close'].pct_change()
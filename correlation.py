@@ -1,21 +1,12 @@
-import yfinance as yf
-import pandas as pd
+from market_data import get_prices
+from universe import column_returns, pairwise_correlation
 
 def calculate_correlation(stock1, stock2, start_date='1925-01-01', end_date='2025-03-07'):
-    # Fetch the historical data for both stocks
-    data1 = yf.download(stock1, start=start_date, end=end_date)['Close']
-    data2 = yf.download(stock2, start=start_date, end=end_date)['Close']
-    
-    # Calculate daily returns for both stocks
-    returns1 = data1.pct_change().dropna()
-    returns2 = data2.pct_change().dropna()
-    
-    # Combine the two series into one DataFrame
-    combined_data = pd.concat([returns1, returns2], axis=1)
-    combined_data.columns = [stock1, stock2]
-    
-    # Calculate the correlation between the returns
-    correlation = combined_data.corr().iloc[0, 1]
+    # Fetch both stocks in one batched call and correlate their daily returns
+    # over the dates both have data
+    prices = get_prices([stock1, stock2], start=start_date, end=end_date)
+    returns = column_returns(prices[[stock1, stock2]])
+    correlation = pairwise_correlation(returns).iloc[0, 1]
     
     print(f"The correlation between {stock1} and {stock2} is: {correlation:.4f}")
     
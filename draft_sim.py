@@ -0,0 +1,170 @@
+"""
+Monte Carlo lookahead for the ncsrcp.py draft
+
+``DraftTracker.recommend_greedy`` scores each team for the current pick
+only.  ``simulate_draft`` instead takes the greedy shortlist as candidates
+and plays out the rest of a snake draft thousands of times for each:
+
+* opponents take the available team with the highest expected points for
+  them (ownership of their own earlier picks included) times lognormal
+  noise, ``exp(noise * z)``;
+* I take the candidate now (it must be my turn) and my greedy choice at
+  every later turn;
+* a candidate's score is my expected total of ``DraftTracker.expected_points``
+  over my picks from now to my last pick, the only part of my final total
+  the candidates can change.
+
+The draft state is a handful of arrays: a candidates x simulations x teams
+availability matrix and candidates x simulations x drafters x competitions
+owned p_champ mass, so one pick of every simulation of every candidate is a
+single batched step.  All candidates see the same noise (common random
+numbers), so their difference is not swamped by simulation noise.
+Simulations are split into blocks run across processes with
+``mc_parallel``, so results do not depend on the number of workers.
+
+Only the ``pool_size`` best available teams by round-independent score
+(E_base * p_norm * L * D) are simulated; the default of twice the picks
+left plus the shortlist is far more than noise ever reaches.  Picks made
+after every simulated team is gone score nothing.  The tracker
+only knows my picks, so opponents start the simulation owning nothing.
+
+Usage:
+    from draft_sim import simulate_draft
+    recs = simulate_draft(tracker, n_drafters=10, my_slot=3, n_rounds=12)
+"""
+
+import numpy as np
+
+from mc_parallel import run_sharded
+
+ROUND_STEP = 0.12  # ncsrcp.round_multiplier: 1 + ROUND_STEP * (round - 1)
+BLOCK_SIZE = 250
+
+
+class DraftArrays:
+    """Array form of a ``DraftTracker``'s state, teams in ``team_ids`` order."""
+
+    def __init__(self, tracker):
+        self.team_ids = list(tracker.teams)
+        comps = list(tracker.comp_index)
+        code = {comp: i for i, comp in enumerate(comps)}
+        self.comp = np.array([code[tracker.teams[tid]["competition"]] for tid in self.team_ids])
+        self.p_norm = np.array([tracker.p_norm[tid] for tid in self.team_ids])
+        self.static = np.array([tracker._static_score(tid) for tid in self.team_ids])
+        self.taken = np.array([tid in tracker.taken for tid in self.team_ids])
+        self.owned = np.array([tracker.owned_mass[comp] for comp in comps])
+        self.has_mine = np.array([bool(tracker.mine[comp]) for comp in comps])
+        self.picks_made = sum(tracker.picks_count.values())
+
+    def subset(self, positions):
+        """The same state restricted to the teams at ``positions``."""
+        sub = object.__new__(DraftArrays)
+        sub.__dict__.update(self.__dict__)
+        sub.team_ids = [self.team_ids[i] for i in positions]
+        for name in ("comp", "p_norm", "static", "taken"):
+            setattr(sub, name, getattr(self, name)[positions])
+        return sub
+
+
+def snake_drafter(pick, n_drafters):
+    """0-based drafter making 0-based overall pick ``pick`` of a snake draft."""
+    rnd, slot = divmod(pick, n_drafters)
+    return slot if rnd % 2 == 0 else n_drafters - 1 - slot
+
+
+def my_remaining_picks(picks_made, n_drafters, my_slot, n_rounds):
+    return [p for p in range(picks_made, n_drafters * n_rounds) if snake_drafter(p, n_drafters) == my_slot]
+
+
+def simulate_block(seed_seq, n_sims, arrays, candidates, n_drafters, my_slot, n_rounds, noise):
+    """
+    My points from now to my last pick, shape (len(candidates), n_sims),
+    when I take team position ``candidates[k]`` at my next turn.
+    ``my_slot`` is 0-based.
+    """
+    rng = np.random.default_rng(seed_seq)
+    candidates = np.asarray(candidates)
+    n_cand, n_teams, n_comps = len(candidates), len(arrays.static), len(arrays.owned)
+    my_picks = my_remaining_picks(arrays.picks_made, n_drafters, my_slot, n_rounds)
+    totals = np.zeros((n_cand, n_sims))
+    if not my_picks:
+        return totals
+
+    shape = (n_cand, n_sims)
+    k_idx, s_idx = np.indices(shape)
+    avail = np.broadcast_to(~arrays.taken, shape + (n_teams,)).copy()
+    owned = np.zeros(shape + (n_drafters, n_comps))
+    has = np.zeros(shape + (n_drafters, n_comps), dtype=bool)
+    owned[..., my_slot, :] = arrays.owned
+    has[..., my_slot, :] = arrays.has_mine
+    # competition x team matrix of static scores: factor @ weights spreads a
+    # per-competition factor over that competition's teams
+    weights = np.zeros((n_comps, n_teams))
+    weights[arrays.comp, np.arange(n_teams)] = arrays.static
+
+    for pick in range(arrays.picks_made, my_picks[-1] + 1):
+        drafter = snake_drafter(pick, n_drafters)
+        # DraftTracker._ownership_factor of this drafter per competition, times each team's static score
+        factor = np.where(has[..., drafter, :], np.maximum(0.0, 1 - owned[..., drafter, :]), 1.0)
+        value = factor @ weights
+        # Once every simulated team is gone argmax would return a taken team; such picks score nothing
+        left = avail.any(axis=-1)
+        if drafter == my_slot:
+            choice = np.argmax(np.where(avail, value, -1.0), axis=-1)
+            if pick == my_picks[0]:
+                choice = np.where(avail[k_idx, s_idx, candidates[:, None]], candidates[:, None], choice)
+            totals += np.where(left, value[k_idx, s_idx, choice], 0.0) * (1.0 + ROUND_STEP * (pick // n_drafters))
+        else:
+            noisy = value * np.exp(noise * rng.standard_normal((n_sims, n_teams)))
+            choice = np.argmax(np.where(avail, noisy, -1.0), axis=-1)
+
+        avail[k_idx, s_idx, choice] = False
+        comp = arrays.comp[choice]
+        owned[k_idx, s_idx, drafter, comp] += np.where(left, arrays.p_norm[choice], 0.0)
+        has[k_idx, s_idx, drafter, comp] |= left
+    return totals
+
+
+def simulate_draft(tracker, n_drafters, my_slot, n_rounds, candidates=8, n_sims=2000, noise=0.35,
+                   seed=0, workers=None, pool_size=None):
+    """
+    The greedy shortlist for the current pick, which must be mine, ranked by
+    simulated expected total (``my_slot`` is 1-based, like a draft order).
+    Each entry is a ``recommend_greedy`` dict plus ``expected_total`` and its
+    ``std_error``.
+    """
+    if not 1 <= my_slot <= n_drafters:
+        raise ValueError(f"my_slot must be between 1 and {n_drafters}")
+    arrays = DraftArrays(tracker)
+    if arrays.picks_made >= n_drafters * n_rounds:
+        raise ValueError("the draft is over")
+    on_the_clock = snake_drafter(arrays.picks_made, n_drafters) + 1
+    if on_the_clock != my_slot:
+        # The shortlist is greedy for the current pick; by my turn it may be gone
+        raise ValueError(f"pick {arrays.picks_made + 1} belongs to slot {on_the_clock}; simulate on your own turn")
+    round_number = arrays.picks_made // n_drafters + 1
+    shortlist = tracker.recommend_greedy(round_number=round_number, top_n=candidates)
+    if not shortlist:
+        return []
+
+    # Simulate only the teams anyone could plausibly take before my last pick
+    picks_left = n_drafters * n_rounds - arrays.picks_made
+    if pool_size is None:
+        pool_size = 2 * picks_left + len(shortlist)
+    available = np.flatnonzero(~arrays.taken)
+    ranked = available[np.argsort(-arrays.static[available], kind="stable")][:pool_size]
+    shortlist_pos = [arrays.team_ids.index(r["team_id"]) for r in shortlist]
+    pool = np.union1d(ranked, shortlist_pos)
+    sub = arrays.subset(pool)
+
+    blocks = run_sharded(
+        simulate_block, n_sims, seed=seed, block_size=BLOCK_SIZE, workers=workers,
+        arrays=sub, candidates=np.searchsorted(pool, shortlist_pos),
+        n_drafters=n_drafters, my_slot=my_slot - 1, n_rounds=n_rounds, noise=noise,
+    )
+    totals = np.concatenate(blocks, axis=1)
+
+    for rec, sims in zip(shortlist, totals):
+        rec["expected_total"] = float(sims.mean())
+        rec["std_error"] = float(sims.std(ddof=1) / np.sqrt(len(sims))) if len(sims) > 1 else 0.0
+    return sorted(shortlist, key=lambda r: r["expected_total"], reverse=True)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from draft_sim import simulate_draft
+from ncsrcp import DraftTracker
+
+NBA = "2025-26 NBA season"
+WNBA = "2026 WNBA season"
+
+
+def tracker():
+    teams = {}
+    for comp, probs in ((NBA, [0.30, 0.20, 0.15, 0.10, 0.05]), (WNBA, [0.40, 0.25, 0.15])):
+        for i, p in enumerate(probs):
+            tid = f"{comp[:9]}_{i}"
+            teams[tid] = {"name": tid, "competition": comp, "p_champ": p}
+    return DraftTracker(teams, my_player_id=1, competition_contenders={})
+
+
+def test_candidates_get_distinct_ordered_totals_on_my_turn():
+    t = tracker()
+    t.register_pick(next(iter(t.teams)), round_number=1)  # slot 1 picked, slot 2 (me) is on the clock
+
+    recs = simulate_draft(t, n_drafters=3, my_slot=2, n_rounds=2, candidates=4, n_sims=500, workers=1)
+
+    totals = [r["expected_total"] for r in recs]
+    assert len(recs) == 4
+    assert len(set(totals)) == len(totals)
+    assert totals == sorted(totals, reverse=True)
+    assert all(np.isfinite(r["std_error"]) for r in recs)
+
+
+def test_rejects_a_pick_that_is_not_mine():
+    with pytest.raises(ValueError, match="belongs to slot 1"):
+        simulate_draft(tracker(), n_drafters=3, my_slot=2, n_rounds=2, workers=1)
+
+
+def test_picks_after_the_pool_runs_out_score_nothing():
+    t = tracker()
+    # 8 teams, 4 drafters x 3 rounds: my last pick comes after every team is gone
+    long_draft = simulate_draft(t, n_drafters=4, my_slot=1, n_rounds=3, candidates=3, n_sims=250, workers=1)
+    short_draft = simulate_draft(t, n_drafters=4, my_slot=1, n_rounds=2, candidates=3, n_sims=250, workers=1)
+
+    assert [r["expected_total"] for r in long_draft] == [r["expected_total"] for r in short_draft]
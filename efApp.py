@@ -1,74 +1,74 @@
 import numpy as np
 import pandas as pd
 import datetime
-import yfinance as yf
 import scipy.optimize as sc
 import plotly.graph_objects as go
 
+import frontier
+from covariance import estimate_covariance
+from market_data import DataPlan, total_returns
+
 # Import data
-def get_data(stocks, start, end):
-    # Download the adjusted closing price data
-    stock_data = yf.download(stocks, start=start, end=end, auto_adjust=True)["Close"].dropna(how="all")
-    
-    # Ensure stock_data index is timezone-naive
-    stock_data.index = stock_data.index.tz_localize(None)
-    
-    # Calculate daily returns
-    returns = stock_data.pct_change()
-    
-    # Add dividend to returns for specific stocks
-    bond_funds = ["BND", "BNDW", "AGG", "TLT"]
+def get_data(stocks, start, end, cov_method="sample"):
+    # Load the adjusted closing prices and the bond funds' dividends in one
+    # batched, cached fetch (timezone-naive)
+    bond_funds = [ticker for ticker in ["BND", "BNDW", "AGG", "TLT"] if ticker in stocks]
+    plan = DataPlan().add_prices("close", stocks, start=start, end=end, auto_adjust=True)
     for ticker in bond_funds:
-        if ticker in stocks:
-            stock = yf.Ticker(ticker)
-            dividends = stock.dividends  # Get dividends for the specified date range
-            
-            # Ensure dividend data index is timezone-naive
-            dividends.index = dividends.index.tz_localize(None)
-
-            # Iterate through stock_data.index and add dividend where dates match
-            for date in stock_data.index:
-                if date in dividends.index:
-                    # Get the dividend for the date and add it to the return
-                    dividend = dividends.loc[date]
-                    returns.loc[date, ticker] += dividend / stock_data.loc[date, ticker]  # Add dividend yield to return
-            
-    # Calculate mean returns and covariance matrix
+        plan.add_dividends(ticker, ticker)
+    data = plan.fetch()
+    stock_data = data.pop("close").dropna(how="all")
+
+    # Daily returns, with the bond funds' dividend yield added on ex-dividend dates
+    returns = total_returns(stock_data, data)
+
+    # Calculate mean returns and the covariance matrix ('sample' is pairwise;
+    # 'ledoit_wolf' and 'ewma' use the dates where every asset has a return,
+    # so the means are taken over the same dates; see covariance.py)
+    if cov_method != "sample":
+        returns = returns.dropna()
     mean_returns = returns.mean()
-    cov_matrix = returns.cov()
+    cov_matrix = estimate_covariance(returns, cov_method)
     
     return mean_returns, cov_matrix
 
 
 def portfolio_performance(weights, mean_returns, cov_matrix):
-    adjusted_returns = np.sum(mean_returns * weights) * 252
-    std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights))) * np.sqrt(252)
+    # Works for one weight vector or a (num_ports x num_assets) matrix of them
+    adjusted_returns, std = frontier.batch_performance(weights, mean_returns, cov_matrix, 252)
     return adjusted_returns, std
 
 def negative_sr(weights, mean_returns, cov_matrix, risk_free_rate=0):
     p_returns, p_std = portfolio_performance(weights, mean_returns, cov_matrix)
     return -(p_returns - risk_free_rate) / p_std
 
+def negative_sr_gradient(weights, mean_returns, cov_matrix, risk_free_rate=0):
+    return frontier.negative_sharpe_gradient(weights, np.asarray(mean_returns) * 252, np.asarray(cov_matrix) * 252,
+                                             risk_free_rate)
+
 def max_sr(mean_returns, cov_matrix, risk_free_rate=0, constraint_set=(0, 1)):
     num_assets = len(mean_returns)
     args = (mean_returns, cov_matrix, risk_free_rate)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones(num_assets)})
     bounds = tuple(constraint_set for _ in range(num_assets))
-    result = sc.minimize(negative_sr, num_assets * [1. / num_assets], args=args,
+    result = sc.minimize(negative_sr, num_assets * [1. / num_assets], args=args, jac=negative_sr_gradient,
                          method='SLSQP', bounds=bounds, constraints=constraints)
     return result
 
 def portfolio_variance(weights, mean_returns, cov_matrix):
     return portfolio_performance(weights, mean_returns, cov_matrix)[1]
 
+def portfolio_variance_gradient(weights, mean_returns, cov_matrix):
+    return frontier.volatility_gradient(weights, np.asarray(cov_matrix) * 252)
+
 def minimize_variance(mean_returns, cov_matrix, constraint_set=(0,1)):
     "Minimize the portfolio variance by altering the weights/allocation of assets in the portfolio"
     num_assets = len(mean_returns)
     args = (mean_returns, cov_matrix)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones(num_assets)})
     bound = constraint_set
     bounds = tuple(bound for asset in range(num_assets))
-    result = sc.minimize(portfolio_variance, num_assets * [1. / num_assets], args=args,
+    result = sc.minimize(portfolio_variance, num_assets * [1. / num_assets], args=args, jac=portfolio_variance_gradient,
                          method='SLSQP', bounds=bounds, constraints=constraints)
     
     return result
@@ -81,19 +81,23 @@ def efficient_opt(mean_returns, cov_matrix, return_target, constraint_set=(0,1))
     num_assets = len(mean_returns)
     args = (mean_returns, cov_matrix)
 
-    constraints = ({'type': 'eq', 'fun': lambda x: portfolio_return(x, mean_returns, cov_matrix) - return_target},
-                   {'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    constraints = ({'type': 'eq', 'fun': lambda x: portfolio_return(x, mean_returns, cov_matrix) - return_target,
+                    'jac': lambda x: np.asarray(mean_returns) * 252},
+                   {'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones(num_assets)})
     bound = constraint_set
     bounds = tuple(bound for asset in range(num_assets))
-    eff_opt = sc.minimize(portfolio_variance, num_assets * [1. / num_assets], args=args,
+    eff_opt = sc.minimize(portfolio_variance, num_assets * [1. / num_assets], args=args, jac=portfolio_variance_gradient,
                          method='SLSQP', bounds=bounds, constraints=constraints)
 
     return eff_opt
 
-def calculated_results(mean_returns, cov_matrix, risk_free_rate=0):
-    max_sr_portfolio = max_sr(mean_returns, cov_matrix, risk_free_rate)
-    max_sr_returns, max_sr_std = portfolio_performance(max_sr_portfolio['x'], mean_returns, cov_matrix)
-    max_sr_allocation = pd.DataFrame(max_sr_portfolio['x'], index=mean_returns.index, columns=['allocation'])
+def calculated_results(mean_returns, cov_matrix, risk_free_rate=0, num_points=20):
+    # Long-only QP engine on annualized inputs (see frontier.py)
+    annual_mean, annual_cov = mean_returns.values * 252, cov_matrix.values * 252
+
+    max_sr_weights = frontier.max_sharpe(annual_mean, annual_cov, risk_free_rate)
+    max_sr_returns, max_sr_std = portfolio_performance(max_sr_weights, mean_returns, cov_matrix)
+    max_sr_allocation = pd.DataFrame(max_sr_weights, index=mean_returns.index, columns=['allocation'])
     max_sr_allocation.allocation = [round(1 * 100, 0) for i in max_sr_allocation.allocation]
 
     # Calculate Sharpe Ratio
@@ -101,7 +105,7 @@ def calculated_results(mean_returns, cov_matrix, risk_free_rate=0):
 
     #Print the weights of the tangency portfolio
     print("Tangency Portfolio Weights (Maximum Sharpe Ratio Portfolio):")
-    for stock, weight in zip(mean_returns.index, max_sr_portfolio['x']):
+    for stock, weight in zip(mean_returns.index, max_sr_weights):
         print(f"{stock}: {weight:.4f}")
     
     # Print the annualized returns, annualized volatility, and Sharpe Ratio as percentages
@@ -110,16 +114,15 @@ def calculated_results(mean_returns, cov_matrix, risk_free_rate=0):
     print(f"Sharpe Ratio of the Tangency Portfolio: {max_sr_sharpe:.4f}\n")
 
     # Min Volatility Portfolio
-    min_vol_portfolio = minimize_variance(mean_returns, cov_matrix)
-    min_vol_returns, min_vol_std = portfolio_performance(min_vol_portfolio['x'], mean_returns, cov_matrix)
-    min_vol_allocation = pd.DataFrame(min_vol_portfolio['x'], index=mean_returns.index, columns=['allocation'])
+    min_vol_weights = frontier.min_variance(annual_mean, annual_cov)
+    min_vol_returns, min_vol_std = portfolio_performance(min_vol_weights, mean_returns, cov_matrix)
+    min_vol_allocation = pd.DataFrame(min_vol_weights, index=mean_returns.index, columns=['allocation'])
     min_vol_allocation.allocation = [round(i * 100, 0) for i in min_vol_allocation.allocation]
 
-    # Efficient Frontier
-    efficient_list = []
-    target_returns = np.linspace(min_vol_returns, max_sr_returns, 20)
-    for target in target_returns:
-        efficient_list.append(efficient_opt(mean_returns, cov_matrix, target)['fun'])
+    # Efficient Frontier, each point warm-started from the previous one
+    target_returns = np.linspace(min_vol_returns, max_sr_returns, num_points)
+    _, efficient_vols = frontier.efficient_frontier(annual_mean, annual_cov, target_returns, start=min_vol_weights)
+    efficient_list = list(efficient_vols)
 
     max_sr_returns, max_sr_std = round(max_sr_returns * 100, 2), round(max_sr_std * 100, 2)
     min_vol_returns, min_vol_std = round(min_vol_returns * 100, 2), round(min_vol_std * 100, 2)
@@ -199,9 +202,11 @@ def ef_graph(mean_returns, cov_matrix, risk_free_rate=0.0462):
     fig = go.Figure(data=data, layout=layout)
     return fig.show()
 
-stock_list = input("Enter the stock tickers (e.g., 'AAPL', 'MSFT', etc.): ").upper().split(',')
-start_date_str = datetime.datetime(1925, 1, 1)
-end_date_str = datetime.datetime(2025, 3, 19)
+if __name__ == "__main__":
+    stock_list = input("Enter the stock tickers (e.g., 'AAPL', 'MSFT', etc.): ").upper().split(',')
+    start_date_str = datetime.datetime(1925, 1, 1)
+    end_date_str = datetime.datetime(2025, 3, 19)
+
+    mean_returns, cov_matrix = get_data(stock_list, start=start_date_str, end=end_date_str)
+    ef_graph(mean_returns, cov_matrix)
 
-mean_returns, cov_matrix = get_data(stock_list, start=start_date_str, end=end_date_str)
-ef_graph(mean_returns, cov_matrix)
@@ -0,0 +1,220 @@
+"""
+Fama-French factor store with a local on-disk cache
+
+Downloads factor files from Kenneth French's data library once, parses every
+section of the CSV (monthly and annual for the monthly files, daily for the
+daily files) into DataFrames of decimal returns, and pickles the parsed
+result under ``~/.cache/market_data/ff_factors`` (or ``FF_FACTORS_CACHE``).
+A cached dataset younger than ``max_age`` seconds is used as-is; an older
+one is revalidated with an HTTP HEAD request and only downloaded again when
+the library's ``Last-Modified`` date has moved.  If the library cannot be
+reached a stale cache is used with a warning.  Pickles written under another
+``CACHE_VERSION`` are ignored and downloaded again.
+
+For offline or air-gapped runs, pass ``zip_path`` to parse a previously
+downloaded ``*_CSV.zip`` directly, or ``offline=True`` to never touch the
+network (the cache must then already hold the dataset).
+
+Regions: US, Developed, Europe, Japan, Asia_Pacific_ex_Japan, North_America
+and Emerging (5 factors only).  Frequencies: monthly, annual, daily.
+
+Usage:
+    from ff_factors import get_factors
+    ff = get_factors("Developed", 5, start="2019-01-01")
+    us_daily = get_factors("US", 3, frequency="daily")
+    offline = get_factors("Developed", 3, zip_path="Developed_3_Factors_CSV.zip")
+"""
+
+import email.utils
+import io
+import os
+import pickle
+import sys
+import time
+import urllib.request
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+BASE_URL = "https://mba.tuck.dartmouth.edu/pages/faculty/ken.french/ftp"
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # seconds before a cached dataset is revalidated
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_data", "ff_factors")
+CACHE_VERSION = 1  # bump when the parsed layout changes so older pickles are refetched
+REGIONS = ["US", "Developed", "Europe", "Japan", "Asia_Pacific_ex_Japan", "North_America", "Emerging"]
+FREQUENCIES = ["monthly", "annual", "daily"]
+MISSING = (-99.99, -999.0)
+
+
+def dataset_name(region: str = "Developed", num_factors: int = 5, daily: bool = False) -> str:
+    """Library file name (without ``_CSV.zip``) of a factor dataset."""
+    if region not in REGIONS:
+        raise ValueError(f"unknown region '{region}'; use one of {REGIONS}")
+    if num_factors not in (3, 5):
+        raise ValueError("num_factors must be 3 or 5")
+    if region == "US":
+        name = "F-F_Research_Data_Factors" if num_factors == 3 else "F-F_Research_Data_5_Factors_2x3"
+        return name + ("_daily" if daily else "")
+    if region == "Emerging" and (num_factors == 3 or daily):
+        raise ValueError("the library only publishes monthly 5-factor data for Emerging markets")
+    return f"{region}_{num_factors}_Factors" + ("_Daily" if daily else "")
+
+
+def parse_sections(raw: str) -> dict[str, pd.DataFrame]:
+    """
+    Split a factor CSV into its sections, keyed by frequency.  Every table
+    starts at a header line containing 'Mkt-RF'; its frequency follows from
+    the date format (YYYYMMDD daily, YYYYMM monthly, YYYY annual).
+    """
+    lines = raw.splitlines()
+    sections = {}
+    i = 0
+    while i < len(lines):
+        if "Mkt-RF" not in lines[i]:
+            i += 1
+            continue
+        header, rows = lines[i], []
+        i += 1
+        while i < len(lines) and lines[i].strip()[:1].isdigit():
+            rows.append(lines[i])
+            i += 1
+        if not rows:
+            continue
+
+        table = pd.read_csv(io.StringIO("\n".join([header] + rows)), index_col=0)
+        table.columns = [c.strip() for c in table.columns]
+        dates = table.index.astype(str).str.strip()
+        width = len(dates[0])
+        if width == 8:
+            frequency, index = "daily", pd.to_datetime(dates, format="%Y%m%d")
+        elif width == 6:
+            frequency, index = "monthly", pd.to_datetime(dates, format="%Y%m") + pd.offsets.MonthEnd(0)
+        else:
+            frequency, index = "annual", pd.to_datetime(dates, format="%Y") + pd.offsets.YearEnd(0)
+        table.index = index
+        table.index.name = "Date"
+
+        # Returns come in percent, with -99.99 / -999 marking missing values
+        table = table.astype(float).replace(list(MISSING), np.nan) / 100.0
+        sections.setdefault(frequency, table)
+    return sections
+
+
+def read_zip(data: bytes) -> dict[str, pd.DataFrame]:
+    """Parse the CSV inside a library zip file."""
+    z = zipfile.ZipFile(io.BytesIO(data))
+    csv_name = next(n for n in z.namelist() if n.lower().endswith(".csv"))
+    with z.open(csv_name) as f:
+        return parse_sections(f.read().decode("utf-8", errors="replace"))
+
+
+class FactorStore:
+    """Parsed factor datasets cached as pickles, revalidated against the library."""
+
+    def __init__(self, cache_dir: str = None, max_age: float = DEFAULT_MAX_AGE, offline: bool = False):
+        self.cache_dir = cache_dir or os.environ.get("FF_FACTORS_CACHE", DEFAULT_CACHE_DIR)
+        self.max_age = max_age
+        self.offline = offline
+        self._loaded = {}
+
+    def _path(self, dataset: str) -> str:
+        return os.path.join(self.cache_dir, f"{dataset}.pkl")
+
+    def _read_cache(self, dataset: str):
+        try:
+            with open(self._path(dataset), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+            return None
+        return entry
+
+    def _write_cache(self, dataset: str, entry: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._path(dataset) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(dataset))
+
+    @staticmethod
+    def _last_modified(url: str) -> float | None:
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            header = resp.headers.get("Last-Modified")
+        return email.utils.parsedate_to_datetime(header).timestamp() if header else None
+
+    def _download(self, dataset: str, url: str) -> dict:
+        print(f"Downloading Fama-French data {dataset} ...")
+        with urllib.request.urlopen(url, timeout=60) as resp:
+            header = resp.headers.get("Last-Modified")
+            data = resp.read()
+        entry = {
+            "version": CACHE_VERSION,
+            "sections": read_zip(data),
+            "last_modified": email.utils.parsedate_to_datetime(header).timestamp() if header else None,
+            "checked_at": time.time(),
+        }
+        self._write_cache(dataset, entry)
+        return entry
+
+    def sections(self, dataset: str, zip_path: str = None) -> dict[str, pd.DataFrame]:
+        """All parsed sections of ``dataset``, from ``zip_path``, the cache or the library."""
+        if zip_path is not None:
+            with open(zip_path, "rb") as f:
+                return read_zip(f.read())
+        if dataset in self._loaded:
+            return self._loaded[dataset]
+
+        entry = self._read_cache(dataset)
+        url = f"{BASE_URL}/{dataset}_CSV.zip"
+        if entry is None:
+            if self.offline:
+                raise FileNotFoundError(f"{dataset} is not cached and the factor store is offline")
+            entry = self._download(dataset, url)
+        elif not self.offline and time.time() - entry["checked_at"] > self.max_age:
+            try:
+                modified = self._last_modified(url)
+                if modified is None or entry["last_modified"] is None or modified > entry["last_modified"]:
+                    entry = self._download(dataset, url)
+                else:
+                    entry["checked_at"] = time.time()
+                    self._write_cache(dataset, entry)
+            except OSError as exc:
+                print(f"Warning: could not revalidate {dataset} ({exc}); using cached data", file=sys.stderr)
+
+        self._loaded[dataset] = entry["sections"]
+        return entry["sections"]
+
+    def factors(self, region: str = "Developed", num_factors: int = 5, frequency: str = "monthly",
+                start=None, end=None, zip_path: str = None) -> pd.DataFrame:
+        """Factor returns (decimal) for one region and frequency, optionally sliced to [start, end]."""
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"unknown frequency '{frequency}'; use one of {FREQUENCIES}")
+        dataset = dataset_name(region, num_factors, daily=frequency == "daily")
+        sections = self.sections(dataset, zip_path)
+        if frequency not in sections:
+            raise ValueError(f"{dataset} has no {frequency} section")
+
+        table = sections[frequency]
+        if start is not None:
+            table = table[table.index >= pd.Timestamp(start)]
+        if end is not None:
+            table = table[table.index <= pd.Timestamp(end)]
+        return table.copy()
+
+
+_default_store = None
+
+
+def default_store() -> FactorStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = FactorStore()
+    return _default_store
+
+
+def get_factors(region: str = "Developed", num_factors: int = 5, frequency: str = "monthly",
+                start=None, end=None, zip_path: str = None) -> pd.DataFrame:
+    """Factor returns from the shared default store."""
+    return default_store().factors(region, num_factors, frequency, start=start, end=end, zip_path=zip_path)
@@ -0,0 +1,291 @@
+"""
+Mean-variance frontier engine
+
+Solves the long-only mean-variance problems behind the efficient frontier
+with a dedicated primal active-set quadratic-programming method instead of a
+general-purpose SLSQP run per point:
+
+    minimize  w' S w   subject to  A w = b,  w >= 0
+
+Each solve works on the exact quadratic (so gradients are analytic by
+construction) and only factors the small KKT system of the currently free
+assets.  Frontier points are solved in order of target return, each one
+warm-started from the previous solution, so consecutive solves usually need
+only a handful of active-set changes.  When short sales are allowed the
+closed-form (Merton) solution is used instead.
+
+``batch_performance`` evaluates returns and volatilities for a whole matrix
+of weight vectors at once, and ``random_portfolio_performance`` uses it to
+score millions of Dirichlet-drawn portfolios in chunks.
+
+All inputs are plain arrays in consistent units (e.g. annualized mean
+returns and covariance).  A low-rank-plus-diagonal
+``covariance.FactorCovariance`` can be passed wherever a covariance matrix
+is expected; products and solves with it then cost O(n k) instead of O(n^2),
+and the active-set solver keeps it in that form, solving each step's KKT
+system through its Schur complement with Woodbury solves on the free assets
+(O(n k^2) per step instead of O(n^3)).
+
+Usage:
+    from frontier import efficient_frontier, max_sharpe, min_variance
+    w_mv = min_variance(mu, cov)
+    w_sr = max_sharpe(mu, cov, risk_free_rate=0.04)
+    weights, vols = efficient_frontier(mu, cov, np.linspace(mu @ w_mv, mu @ w_sr, 200))
+    vols_rets_sharpes = random_portfolio_performance(1_000_000, mu, cov, risk_free_rate=0.04)
+"""
+
+import numpy as np
+import scipy.optimize as sc
+
+TOL = 1e-10
+
+
+# ── Objective values and analytic gradients ──
+
+def portfolio_volatility(weights: np.ndarray, cov: np.ndarray) -> float:
+    # Rounding can leave w'Sw slightly negative for a singular or low-rank S
+    return float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+
+
+def variance_gradient(weights: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """Gradient of w' S w."""
+    return 2 * cov @ weights
+
+
+def volatility_gradient(weights: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """Gradient of sqrt(w' S w)."""
+    cov_w = cov @ weights
+    return cov_w / np.sqrt(weights @ cov_w)
+
+
+def negative_sharpe(weights: np.ndarray, mu: np.ndarray, cov: np.ndarray, risk_free_rate: float = 0.0) -> float:
+    return -(weights @ mu - risk_free_rate) / portfolio_volatility(weights, cov)
+
+
+def negative_sharpe_gradient(weights: np.ndarray, mu: np.ndarray, cov: np.ndarray,
+                             risk_free_rate: float = 0.0) -> np.ndarray:
+    """Gradient of -(w' mu - rf) / sqrt(w' S w)."""
+    cov_w = cov @ weights
+    vol = np.sqrt(weights @ cov_w)
+    excess = weights @ mu - risk_free_rate
+    return -(mu / vol - excess * cov_w / vol**3)
+
+
+def _solve(cov, b: np.ndarray) -> np.ndarray:
+    """cov^-1 b, using the structured solve of a factor covariance when available."""
+    return cov.solve(b) if hasattr(cov, "solve") else np.linalg.solve(cov, b)
+
+
+# ── Batched evaluation ──
+
+def batch_performance(weights: np.ndarray, mean_returns, cov_matrix, periods_per_year: int = 1):
+    """
+    Returns and volatilities of one weight vector (n,) or many (k, n) in one
+    pass, scaled by ``periods_per_year`` (e.g. 252 for daily inputs).
+    """
+    weights = np.asarray(weights, dtype=float)
+    mu = np.asarray(mean_returns, dtype=float)
+    returns = weights @ mu * periods_per_year
+    if hasattr(cov_matrix, "portfolio_variance"):
+        variances = cov_matrix.portfolio_variance(weights)
+    else:
+        variances = np.einsum("...i,ij,...j->...", weights, np.asarray(cov_matrix, dtype=float), weights)
+    return returns, np.sqrt(np.maximum(variances, 0.0) * periods_per_year)
+
+
+def random_portfolios(num_ports: int, num_assets: int, seed=None, chunk_size: int = 100_000):
+    """Yield long-only weight matrices drawn uniformly from the simplex (Dirichlet(1)), in chunks."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_ports, chunk_size):
+        yield rng.dirichlet(np.ones(num_assets), size=min(chunk_size, num_ports - start))
+
+
+def random_portfolio_performance(num_ports: int, mean_returns, cov_matrix, risk_free_rate: float = 0.0,
+                                 periods_per_year: int = 1, seed=None, chunk_size: int = 100_000) -> np.ndarray:
+    """
+    Volatility, return and Sharpe ratio of ``num_ports`` random portfolios,
+    as a (3, num_ports) array, evaluated chunk by chunk.
+    """
+    results = np.empty((3, num_ports))
+    start = 0
+    for weights in random_portfolios(num_ports, len(mean_returns), seed, chunk_size):
+        stop = start + len(weights)
+        rets, vols = batch_performance(weights, mean_returns, cov_matrix, periods_per_year)
+        results[0, start:stop] = vols
+        results[1, start:stop] = rets
+        results[2, start:stop] = (rets - risk_free_rate) / vols
+        start = stop
+    return results
+
+
+# ── Active-set QP ──
+
+def _structured_step(Q_ff, A_f: np.ndarray, g_f: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    KKT step on the free assets by its Schur complement: p = Q^-1 (A' lambda - g)
+    with (A Q^-1 A') lambda = A Q^-1 g, using the structured ``Q_ff.solve``.
+    """
+    inv = Q_ff.solve(np.column_stack([g_f, A_f.T]))
+    inv_g, inv_At = inv[:, 0], inv[:, 1:]
+    lam = np.linalg.lstsq(A_f @ inv_At, A_f @ inv_g, rcond=None)[0]
+    return inv_At @ lam - inv_g, lam
+
+
+def solve_qp(Q, A: np.ndarray, b: np.ndarray, x0: np.ndarray,
+             c: np.ndarray = None, max_iter: int = None) -> np.ndarray:
+    """
+    Minimize 1/2 x'Qx + c'x subject to Ax = b and x >= 0 with a primal
+    active-set method, starting from the feasible point ``x0``.  ``Q`` is a
+    matrix or a ``covariance.FactorCovariance``, which is never made dense.
+    """
+    structured = hasattr(Q, "submatrix")
+    if not structured:
+        Q = np.asarray(Q, dtype=float)
+    n = Q.shape[0]
+    A = np.atleast_2d(A)
+    c = np.zeros(n) if c is None else c
+    max_iter = max_iter or 10 * n + 50
+
+    x = np.clip(np.asarray(x0, dtype=float), 0, None)
+    active = x <= TOL
+    x[active] = 0.0
+
+    for _ in range(max_iter):
+        free = ~active
+        grad = Q @ x + c
+
+        # Step on the free assets: [Q_FF  -A_F'; A_F  0] [p; lambda] = [-g_F; 0]
+        step = np.zeros(n)
+        if structured:
+            step[free], lam = _structured_step(Q.submatrix(free), A[:, free], grad[free])
+        else:
+            n_free, m = free.sum(), A.shape[0]
+            kkt = np.zeros((n_free + m, n_free + m))
+            kkt[:n_free, :n_free] = Q[np.ix_(free, free)]
+            kkt[:n_free, n_free:] = -A[:, free].T
+            kkt[n_free:, :n_free] = A[:, free]
+            rhs = np.concatenate([-grad[free], np.zeros(m)])
+            try:
+                sol = np.linalg.solve(kkt, rhs)
+            except np.linalg.LinAlgError:
+                sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+            step[free] = sol[:n_free]
+            lam = sol[n_free:]
+
+        if np.max(np.abs(step), initial=0.0) <= TOL * max(1.0, np.max(np.abs(x))):
+            # Stationary on the working set: release the bound with the most negative multiplier
+            multipliers = grad - A.T @ lam
+            multipliers[free] = np.inf
+            worst = int(np.argmin(multipliers))
+            if multipliers[worst] >= -TOL * max(1.0, np.max(np.abs(grad))):
+                return x
+            active[worst] = False
+            continue
+
+        # Longest feasible step; the first asset to hit zero joins the working set
+        shrinking = free & (step < 0)
+        ratios = np.full(n, np.inf)
+        ratios[shrinking] = -x[shrinking] / step[shrinking]
+        blocking = int(np.argmin(ratios))
+        alpha = min(1.0, ratios[blocking])
+        x = x + alpha * step
+        if alpha < 1.0:
+            x[blocking] = 0.0
+            active[blocking] = True
+        np.clip(x, 0, None, out=x)
+
+    return x
+
+
+# ── Closed-form (short sales allowed) ──
+
+def _merton_constants(mu: np.ndarray, cov: np.ndarray):
+    ones = np.ones(len(mu))
+    inv_ones = _solve(cov, ones)
+    inv_mu = _solve(cov, mu)
+    a, b_, c = ones @ inv_ones, ones @ inv_mu, mu @ inv_mu
+    return inv_ones, inv_mu, a, b_, c, a * c - b_ * b_
+
+
+def unconstrained_frontier(mu: np.ndarray, cov: np.ndarray, targets) -> tuple[np.ndarray, np.ndarray]:
+    """Closed-form frontier weights and volatilities when short sales are allowed."""
+    inv_ones, inv_mu, a, b_, c, d = _merton_constants(mu, cov)
+    targets = np.asarray(targets, dtype=float)
+    weights = (np.outer(c - b_ * targets, inv_ones) + np.outer(a * targets - b_, inv_mu)) / d
+    vols = np.sqrt((a * targets**2 - 2 * b_ * targets + c) / d)
+    return weights, vols
+
+
+# ── Portfolios ──
+
+def min_variance(mu: np.ndarray, cov: np.ndarray, long_only: bool = True) -> np.ndarray:
+    """Global minimum-variance weights."""
+    n = len(mu)
+    if not long_only:
+        inv_ones = _solve(cov, np.ones(n))
+        return inv_ones / inv_ones.sum()
+    return solve_qp(cov, np.ones((1, n)), np.array([1.0]), np.full(n, 1.0 / n))
+
+
+def max_sharpe(mu: np.ndarray, cov: np.ndarray, risk_free_rate: float = 0.0, long_only: bool = True) -> np.ndarray:
+    """
+    Tangency (maximum Sharpe ratio) weights.  Long-only, this is the QP
+    min y'Sy s.t. (mu - rf)'y = 1, y >= 0, rescaled to w = y / sum(y).
+    """
+    excess = mu - risk_free_rate
+    if not long_only:
+        raw = _solve(cov, excess)
+        return raw / raw.sum()
+
+    best = int(np.argmax(excess))
+    if excess[best] <= 0:
+        # No asset beats the risk-free rate; fall back to a direct search
+        n = len(mu)
+        result = sc.minimize(negative_sharpe, np.full(n, 1.0 / n), args=(mu, cov, risk_free_rate),
+                             jac=negative_sharpe_gradient, method="SLSQP", bounds=[(0, 1)] * n,
+                             constraints={"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones(n)})
+        return result.x
+
+    y0 = np.zeros(len(mu))
+    y0[best] = 1.0 / excess[best]
+    y = solve_qp(cov, excess[None, :], np.array([1.0]), y0)
+    return y / y.sum()
+
+
+def efficient_frontier(mu: np.ndarray, cov: np.ndarray, targets, long_only: bool = True,
+                       start: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-volatility weights and volatilities for each target return.
+
+    Long-only targets must lie between the lowest and highest asset return.
+    Targets are solved in ascending order, each warm-started from the
+    previous solution blended with a single-asset corner portfolio to hit
+    the new target exactly (``start`` seeds the first solve; default: the
+    minimum-variance portfolio).
+    """
+    targets = np.asarray(targets, dtype=float)
+    if not long_only:
+        return unconstrained_frontier(mu, cov, targets)
+
+    n = len(mu)
+    if targets.min() < mu.min() - TOL or targets.max() > mu.max() + TOL:
+        raise ValueError("long-only target returns must lie between the lowest and highest asset return")
+
+    lowest, highest = np.eye(n)[int(np.argmin(mu))], np.eye(n)[int(np.argmax(mu))]
+    previous = min_variance(mu, cov) if start is None else np.asarray(start, dtype=float)
+    constraints = np.vstack([np.ones(n), mu])
+
+    weights = np.empty((len(targets), n))
+    for i in np.argsort(targets):
+        target = targets[i]
+        prev_return = previous @ mu
+        corner = highest if target >= prev_return else lowest
+        gap = corner @ mu - prev_return
+        theta = 0.0 if abs(gap) <= TOL else np.clip((target - prev_return) / gap, 0.0, 1.0)
+        x0 = (1 - theta) * previous + theta * corner
+
+        previous = solve_qp(cov, constraints, np.array([1.0, target]), x0)
+        weights[i] = previous
+
+    _, vols = batch_performance(weights, mu, cov)
+    return weights, vols
@@ -0,0 +1,145 @@
+"""
+Columnar fund holdings with a binary cache
+
+Loads a fund basket file such as ``vt.json`` (a JSON object with fund-level
+fields and a ``holding`` list of ~50-key dicts) into one pandas DataFrame
+with only the columns the analysis needs, low-cardinality text columns
+(country, sector, currency, ...) stored as categoricals.  The parsed result
+is pickled under ``~/.cache/market_data/holdings`` (or ``HOLDINGS_CACHE``)
+keyed on the source file's path, size and modification time, so later loads
+skip the JSON parse entirely until the file changes.
+
+``Holdings`` builds hash indexes by ticker, ISIN, SEDOL and CUSIP on first
+use.  ISINs and SEDOLs are unique within a basket, but a ticker can appear
+on several exchanges (e.g. MRK in the US and Germany), so every lookup
+returns an array of row positions.
+
+Usage:
+    from holdings import load_holdings
+    vt = load_holdings("vt.json")
+    vt.frame.groupby("country", observed=True)["weight"].sum()
+    vt.rows("US0378331005")           # by ISIN, SEDOL, CUSIP or ticker
+    vt.locate("MRK", field="ticker")  # row positions
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "market_data", "holdings")
+CACHE_VERSION = 1
+
+# source key -> column name
+COLUMNS = {
+    "ticker": "ticker",
+    "extraTicker": "extra_ticker",
+    "isin": "isin",
+    "sedol": "sedol",
+    "cusip": "cusip",
+    "shrtName": "name",
+    "assetType": "asset_type",
+    "primaryExchange": "exchange",
+    "country": "country",
+    "countryName": "country_name",
+    "sector": "sector",
+    "currency": "currency",
+    "weighting": "weighting",
+    "marketValue": "market_value",
+    "shareQuantity": "shares",
+}
+CATEGORICAL = ["asset_type", "exchange", "country", "country_name", "sector", "currency"]
+NUMERIC = ["weighting", "market_value", "shares"]
+ID_FIELDS = ["isin", "sedol", "cusip", "ticker"]
+
+
+def parse_basket(raw: dict) -> tuple[pd.DataFrame, dict]:
+    """Columnar holdings frame and fund-level metadata from a parsed basket file."""
+    records = raw.get("holding", [])
+    frame = pd.DataFrame({column: [h.get(key) for h in records] for key, column in COLUMNS.items()})
+
+    for column in ["ticker", "extra_ticker", "isin", "sedol", "cusip", "name"]:
+        frame[column] = frame[column].fillna("").astype(str).str.strip()
+    for column in NUMERIC:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    for column in CATEGORICAL:
+        frame[column] = frame[column].astype("category")
+    frame["weight"] = frame["weighting"] / 100.0  # fraction of the fund
+
+    meta = {key: value for key, value in raw.items() if key != "holding"}
+    return frame, meta
+
+
+class Holdings:
+    """One fund's holdings: a columnar frame, fund metadata and identifier indexes."""
+
+    def __init__(self, frame: pd.DataFrame, meta: dict = None, source: str = None):
+        self.frame = frame
+        self.meta = meta or {}
+        self.source = source
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def index(self, field: str) -> dict[str, np.ndarray]:
+        """Identifier -> row positions for ``field`` (one of ID_FIELDS), built once."""
+        if field not in ID_FIELDS:
+            raise ValueError(f"unknown identifier field '{field}'; use one of {ID_FIELDS}")
+        if field not in self._indexes:
+            values = self.frame[field].to_numpy()
+            groups = pd.Series(np.arange(len(values))).groupby(values).indices
+            groups.pop("", None)
+            self._indexes[field] = groups
+        return self._indexes[field]
+
+    def locate(self, identifier: str, field: str = None) -> np.ndarray:
+        """
+        Row positions of ``identifier``, looked up in ``field`` or else in
+        ISIN, SEDOL, CUSIP and ticker order (first field that matches).
+        """
+        fields = [field] if field else ID_FIELDS
+        for name in fields:
+            positions = self.index(name).get(identifier)
+            if positions is not None:
+                return positions
+        return np.array([], dtype=int)
+
+    def rows(self, identifier: str, field: str = None) -> pd.DataFrame:
+        return self.frame.iloc[self.locate(identifier, field)]
+
+
+def _cache_path(path: str, cache_dir: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{digest}.pkl")
+
+
+def load_holdings(path: str, cache_dir: str = None, use_cache: bool = True) -> Holdings:
+    """Load a basket file, from the binary cache when the file is unchanged since it was cached."""
+    cache_dir = cache_dir or os.environ.get("HOLDINGS_CACHE", DEFAULT_CACHE_DIR)
+    stat = os.stat(path)
+    stamp = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+    cache_path = _cache_path(path, cache_dir)
+
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["stamp"] == stamp:
+                return Holdings(cached["frame"], cached["meta"], source=path)
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+    with open(path) as f:
+        frame, meta = parse_basket(json.load(f))
+
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"stamp": stamp, "frame": frame, "meta": meta}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    return Holdings(frame, meta, source=path)
@@ -0,0 +1,160 @@
+"""
+Scenario grid for unrecoverableCost.py
+
+Evaluates the unrecoverable cost of owning a home (the break-even annual
+rent), the optimal down payment and the minimum unrecoverable cost for a
+whole table of scenarios at once, without the interactive prompts.  The
+closed-form ``wacc_with_pmi`` broadcasts, so each chunk of scenarios is one
+array evaluation, and the optimal down payment comes from evaluating every
+scenario against a grid of down payments as one 2-D array (resolution
+``--dp-step``).  Large grids are split into chunks across processes.
+
+The scenario table comes either from a CSV whose columns are any of
+PARAMETERS (missing columns take the defaults) or from the cartesian
+product of values given on the command line.  Rates are decimals, as in
+unrecoverableCost.py.
+
+Usage:
+    python home_scenarios.py --price 400000 500000 600000 --rate 0.05 0.06 0.07 --cape 25 30 35 --out table.csv
+    python home_scenarios.py --grid scenarios.csv --workers 8 --out table.csv
+"""
+
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from unrecoverableCost import unrecoverable_cost_given_down_payment, wacc_with_pmi
+
+PARAMETERS = {
+    "price": 500_000.0,
+    "down_payment": 0.20,
+    "term_years": 30,
+    "rate": 0.065,
+    "property_tax": 0.01,
+    "hoa": 0.005,
+    "insurance": 0.004,
+    "pmi_rate": 0.005,
+    "cape": 30.0,
+    "target_cape": 20.0,
+    "earnings_growth": 0.02,
+    "real_estate_return": 0.01,
+    "closing_cost": 0.03,
+}
+CHUNK_SIZE = 2_000
+
+
+def cost_of_equity(cape, target_cape, earnings_growth, real_estate_return):
+    """Expected stock return (earnings yield + growth + 10-year CAPE reversion) less real estate's."""
+    valuation_change = (target_cape / cape) ** (1 / 10) - 1
+    return 1 / cape + earnings_growth + valuation_change - real_estate_return
+
+
+def load_grid(path: str) -> pd.DataFrame:
+    grid = pd.read_csv(path)
+    grid.columns = [c.strip().lower() for c in grid.columns]
+    unknown = [c for c in grid.columns if c not in PARAMETERS]
+    if unknown:
+        sys.exit(f"Error: unknown column(s) {', '.join(unknown)}; use {', '.join(PARAMETERS)}")
+    for name, default in PARAMETERS.items():
+        if name not in grid.columns:
+            grid[name] = default
+    return grid[list(PARAMETERS)]
+
+
+def product_grid(values: dict) -> pd.DataFrame:
+    """Cartesian product of the given parameter values (defaults for the rest)."""
+    axes = [values.get(name) or [default] for name, default in PARAMETERS.items()]
+    return pd.DataFrame(list(itertools.product(*axes)), columns=list(PARAMETERS))
+
+
+def evaluate(grid: pd.DataFrame, dp_step: float = 0.001) -> pd.DataFrame:
+    """Results for every scenario row, vectorized over rows and the down-payment grid."""
+    p = {name: grid[name].to_numpy(dtype=float) for name in PARAMETERS}
+    coe = cost_of_equity(p["cape"], p["target_cape"], p["earnings_growth"], p["real_estate_return"])
+    args = (p["price"], coe, p["rate"], p["term_years"], p["closing_cost"], p["pmi_rate"],
+            p["property_tax"], p["hoa"], p["insurance"])
+
+    avg_wacc, pmi_total, closing_costs, monthly_payment = wacc_with_pmi(
+        p["price"], p["down_payment"], coe, p["rate"], p["term_years"], p["closing_cost"], p["pmi_rate"])
+    # As unrecoverableCost.main() reports it: closing costs spread over the term, PMI not included
+    unrecoverable = ((avg_wacc + p["property_tax"] + p["hoa"] + p["insurance"]) * p["price"]
+                     + closing_costs / p["term_years"])
+
+    # Every scenario (rows) against every down payment (columns) in one evaluation
+    dp_grid = np.linspace(0.0, 1.0, int(round(1 / dp_step)) + 1)
+    costs = unrecoverable_cost_given_down_payment(dp_grid[None, :], *(np.asarray(a)[:, None] for a in args))
+    best = np.argmin(costs, axis=1)
+
+    return pd.DataFrame({
+        "cost_of_equity": coe,
+        "monthly_payment": monthly_payment,
+        "average_wacc": avg_wacc,
+        "pmi_total": pmi_total,
+        "capital_invested": p["price"] * p["down_payment"] + closing_costs,
+        "unrecoverable_cost": unrecoverable,
+        "break_even_monthly_rent": unrecoverable / 12,
+        "optimal_down_payment": dp_grid[best],
+        "min_unrecoverable_cost": costs[np.arange(len(best)), best],
+    }, index=grid.index)
+
+
+def run_scenarios(grid: pd.DataFrame, dp_step: float = 0.001, workers: int | None = None,
+                  chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Evaluate ``grid`` in chunks (across processes when it is large) and append the results."""
+    grid = grid.reset_index(drop=True)
+    # An empty grid is one empty chunk, so the result still has every column
+    chunks = [grid.iloc[start:start + chunk_size] for start in range(0, len(grid), chunk_size)] or [grid]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        results = [evaluate(chunk, dp_step) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(evaluate, chunks, itertools.repeat(dp_step)))
+
+    return pd.concat([grid, pd.concat(results)], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Unrecoverable cost, optimal down payment and break-even rent for a grid of home scenarios.",
+        epilog="Example:  python home_scenarios.py --price 400000 600000 --rate 0.05 0.07 --out table.csv",
+    )
+    parser.add_argument("--grid", help=f"CSV with any of the columns {', '.join(PARAMETERS)}")
+    for name, default in PARAMETERS.items():
+        kind = int if name == "term_years" else float
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=kind, nargs="+",
+                            help=f"Value(s) for {name} (default: {default})")
+    parser.add_argument("--dp-step", type=float, default=0.001,
+                        help="Down-payment grid step for the optimum (default: 0.001)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", help="Write the results table to this CSV file")
+    args = parser.parse_args()
+
+    if args.grid:
+        grid = load_grid(args.grid)
+    else:
+        grid = product_grid({name: getattr(args, name) for name in PARAMETERS})
+
+    print(f"Evaluating {len(grid):,} scenarios ...")
+    results = run_scenarios(grid, dp_step=args.dp_step, workers=args.workers)
+
+    columns = ["price", "rate", "down_payment", "cape", "unrecoverable_cost", "break_even_monthly_rent",
+               "optimal_down_payment", "min_unrecoverable_cost"]
+    with pd.option_context("display.max_rows", 50, "display.width", 200, "display.float_format", "{:,.4f}".format):
+        print(results[columns].to_string(index=False) if len(results) <= 50 else results[columns].describe().to_string())
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\nResults saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
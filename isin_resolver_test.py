@@ -0,0 +1,33 @@
+from holdings import Holdings, parse_basket
+from isin_resolver import IsinCache, IsinResolver, StubBackend
+
+
+def basket(rows):
+    frame, meta = parse_basket({"holding": [
+        {"ticker": ticker, "isin": isin, "primaryExchange": exchange} for ticker, exchange, isin in rows
+    ]})
+    return Holdings(frame, meta)
+
+
+def test_resolve_holdings_maps_local_tickers_and_defers_unsure_ones():
+    rows = [
+        ("RR.", "XLON", "GB00B63H8491"),
+        ("BP.", "XLON", "GB0007980591"),
+        ("BT.A", "XLON", "GB0030913577"),
+        ("BIMAS.E", "XIST", "TREBIMM00018"),
+        ("AKSA.E", "XIST", "TRAAKSAW91E1"),
+        ("BRK.B", "XNYS", "US0846707026"),
+        ("NOVO B", "XCSE", "DK0062498333"),
+        ("5", "XHKG", "GB0005405286"),
+        ("ABC.X", "XTKS", "JP0000000001"),
+    ]
+    backend = StubBackend({"JP0000000001": "9999.T"})
+    resolver = IsinResolver(backend, cache=IsinCache(":memory:"), rate=1000)
+
+    result = resolver.resolve_holdings(basket(rows))
+
+    assert list(result["symbol"]) == [
+        "RR.L", "BP.L", "BT-A.L", "BIMAS.IS", "AKSA.IS", "BRK-B", "NOVO-B.CO", "0005.HK", "9999.T",
+    ]
+    assert list(result["source"]) == ["holding"] * 8 + ["lookup"]
+    assert backend.calls == ["JP0000000001"]
@@ -0,0 +1,192 @@
+"""
+Look-through exposures for portfolios of funds
+
+Combines per-fund basket files (e.g. ``vt.json``, loaded with ``holdings``)
+into one sparse fund x security weight matrix H, with securities identified
+by ISIN across all funds.  A ``TICKER:WEIGHT`` portfolio (the format
+``capm_alpha.py`` uses) then looks through to its securities with one
+sparse product w' H, and country / sector / currency exposures are a second
+sparse product with a security x group indicator matrix.  Tickers without a
+basket file count as direct holdings of that security.
+
+Overlaps between funds come from the same matrix: with B the 0/1 pattern of
+H, B B' counts the securities every pair of funds shares and H B' gives the
+weight of each fund sitting in names the other fund also holds.  Funds'
+weights do not always sum to exactly 100% (cash, rounding); the remainder
+is reported as "Unclassified".
+
+Usage:
+    python lookthrough.py VT:0.60 AVDV:0.40 --fund VT=vt.json --fund AVDV=avdv.json
+    python lookthrough.py VT:0.70 AAPL:0.30 --fund VT=vt.json --by country sector --top 10 --overlap
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from capm_alpha import parse_portfolio
+from holdings import load_holdings
+
+GROUP_FIELDS = ["country", "sector", "currency"]
+UNCLASSIFIED = "Unclassified"
+
+
+class LookThrough:
+    """Funds' holdings as one sparse fund x security weight matrix."""
+
+    def __init__(self, funds: dict):
+        """``funds`` maps fund ticker -> ``holdings.Holdings``."""
+        self.funds = [name.upper() for name in funds]
+        frames = []
+        for name, basket in funds.items():
+            frame = basket.frame[["ticker", "isin", "name"] + GROUP_FIELDS + ["weight"]].copy()
+            frame["fund"] = name.upper()
+            frames.append(frame)
+        rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["ticker", "isin", "name", *GROUP_FIELDS, "weight", "fund"])
+
+        # One column per security across funds: ISIN, or the ticker when a holding has none
+        key = rows["isin"].where(rows["isin"] != "", "TICKER:" + rows["ticker"].astype(str))
+        codes, ids = pd.factorize(key)
+        fund_codes = pd.Index(self.funds).get_indexer(rows["fund"])
+        self.matrix = sp.csr_matrix(
+            (rows["weight"].fillna(0.0).to_numpy(dtype=float), (fund_codes, codes)),
+            shape=(len(self.funds), len(ids)),
+        )
+
+        # Security attributes from the first fund that holds it
+        first = rows.assign(_code=codes).drop_duplicates("_code").set_index("_code").sort_index()
+        self.securities = pd.DataFrame({
+            "isin": first["isin"].to_numpy(),
+            "ticker": first["ticker"].to_numpy(),
+            "name": first["name"].to_numpy(),
+            **{field: first[field].astype(str).to_numpy() for field in GROUP_FIELDS},
+        }, index=pd.Index(ids, name="security"))
+        self._ticker_index = pd.Series(np.arange(len(ids))).groupby(self.securities["ticker"].to_numpy()).first()
+
+    def security_weights(self, portfolio: dict[str, float]) -> tuple[pd.Series, float]:
+        """
+        Portfolio weight in every security (funds looked through, other
+        tickers held directly), plus the weight that could not be mapped
+        to any security.
+        """
+        fund_weights = np.array([portfolio.get(name, 0.0) for name in self.funds])
+        weights = np.asarray(self.matrix.T @ fund_weights).ravel()
+
+        securities = self.securities
+        direct = {t: w for t, w in portfolio.items() if t not in self.funds}
+        extra = {}
+        for ticker, weight in direct.items():
+            position = self._ticker_index.get(ticker)
+            if position is not None:
+                weights[position] += weight
+            else:
+                extra[ticker] = weight
+        if extra:
+            securities = pd.concat([securities, pd.DataFrame(
+                {"isin": "", "ticker": list(extra), "name": list(extra),
+                 **{field: UNCLASSIFIED for field in GROUP_FIELDS}},
+                index=pd.Index([f"TICKER:{t}" for t in extra], name="security"),
+            )])
+            weights = np.concatenate([weights, list(extra.values())])
+
+        unmapped = sum(portfolio.values()) - weights.sum()
+        return pd.Series(weights, index=securities.index), unmapped
+
+    def exposure(self, portfolio: dict[str, float], by: str) -> pd.Series:
+        """Portfolio weight by ``by`` (country, sector or currency), largest first."""
+        weights, unmapped = self.security_weights(portfolio)
+        labels = self.securities[by].reindex(weights.index).fillna(UNCLASSIFIED)
+        codes, groups = pd.factorize(labels)
+        indicator = sp.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)),
+                                  shape=(len(codes), len(groups)))
+        totals = pd.Series(indicator.T @ weights.to_numpy(), index=groups, name="weight")
+        if abs(unmapped) > 1e-12:
+            totals[UNCLASSIFIED] = totals.get(UNCLASSIFIED, 0.0) + unmapped
+        totals.index.name = by
+        return totals[totals != 0].sort_values(ascending=False)
+
+    def overlap(self) -> dict[str, pd.DataFrame]:
+        """
+        Pairwise fund overlaps: ``common`` (number of shared securities),
+        ``shared_weight`` (row fund's weight in names the column fund also
+        holds) and ``overlap`` (sum of the smaller of the two weights).
+        """
+        held = self.matrix.copy()
+        held.data = np.ones_like(held.data)
+        common = (held @ held.T).toarray()
+        shared = (self.matrix @ held.T).toarray()
+
+        n = len(self.funds)
+        overlap = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i, n):
+                overlap[i, j] = overlap[j, i] = self.matrix[i].minimum(self.matrix[j]).sum()
+
+        def frame(values):
+            return pd.DataFrame(values, index=self.funds, columns=self.funds)
+        return {"common": frame(common.astype(int)), "shared_weight": frame(shared), "overlap": frame(overlap)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Country, sector and currency look-through exposures of a portfolio of funds.",
+        epilog="Example:  python lookthrough.py VT:0.60 AVDV:0.40 --fund VT=vt.json --fund AVDV=avdv.json",
+    )
+    parser.add_argument("holdings", nargs="+", help="TICKER:WEIGHT pairs (e.g. VT:0.60)")
+    parser.add_argument("--fund", action="append", default=[], metavar="TICKER=FILE",
+                        help="Basket file for a fund ticker (repeatable)")
+    parser.add_argument("--by", nargs="+", default=GROUP_FIELDS, choices=GROUP_FIELDS,
+                        help="Exposures to report (default: country sector currency)")
+    parser.add_argument("--top", type=int, default=15, help="Rows to show per exposure (default: 15)")
+    parser.add_argument("--overlap", action="store_true", help="Also report pairwise fund overlaps")
+    parser.add_argument("--out", help="Write all exposures to this CSV file")
+    args = parser.parse_args()
+
+    portfolio = parse_portfolio(args.holdings)
+    funds = {}
+    for item in args.fund:
+        try:
+            ticker, path = item.split("=", 1)
+        except ValueError:
+            sys.exit(f"Error: '{item}' is not in TICKER=FILE format (e.g. VT=vt.json)")
+        funds[ticker.upper()] = load_holdings(path)
+    if not funds:
+        sys.exit("Error: give at least one --fund TICKER=FILE basket")
+
+    engine = LookThrough(funds)
+    exposures = {by: engine.exposure(portfolio, by) for by in args.by}
+
+    for by, totals in exposures.items():
+        print("\n" + "-" * 50)
+        print(f"  Exposure by {by}")
+        print("-" * 50)
+        for label, weight in totals.head(args.top).items():
+            print(f"  {label[:38]:38s}  {weight:>7.2%}")
+        if len(totals) > args.top:
+            print(f"  {'(' + str(len(totals) - args.top) + ' more)':38s}  {totals.iloc[args.top:].sum():>7.2%}")
+
+    if args.overlap and len(engine.funds) > 1:
+        overlaps = engine.overlap()
+        with pd.option_context("display.float_format", "{:.2%}".format):
+            print("\nShared securities:")
+            print(overlaps["common"].to_string())
+            print("\nWeight of row fund in names the column fund also holds:")
+            print(overlaps["shared_weight"].to_string())
+            print("\nOverlap (sum of the smaller weight):")
+            print(overlaps["overlap"].to_string())
+
+    if args.out:
+        table = pd.concat(
+            [totals.rename_axis("group").reset_index().assign(dimension=by) for by, totals in exposures.items()],
+            ignore_index=True,
+        )[["dimension", "group", "weight"]]
+        table.to_csv(args.out, index=False)
+        print(f"\nExposures saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+Shared market-data layer with a persistent local cache
+
+All analysis scripts load prices and dividends through this module instead of
+calling ``yf.download`` / ``yf.Ticker`` directly.  Daily (or weekly/monthly)
+bars, including the dividend and split columns, are cached per
+(ticker, interval, adjusted) key in a local SQLite file together with the
+date range already fetched.  Later requests only download the missing part
+of the range, batched into one ``yf.download`` call per distinct gap; the
+most recent bar is refreshed once it is older than ``ttl`` seconds.
+
+Adjusted prices are rewritten by Yahoo whenever a new dividend or split is
+paid, so when an incremental fetch for an adjusted series contains one, the
+whole cached history for that ticker is refetched.
+
+Both the data source and the store are pluggable, so tests and offline runs
+can use ``CSVFixtureSource`` and ``MemoryStore`` instead of the network and
+the on-disk cache.  The cache lives at ``~/.cache/market_data/market_data.sqlite``
+unless the ``MARKET_DATA_CACHE`` environment variable points elsewhere.
+
+Usage:
+    from market_data import get_prices, get_dividends
+    prices = get_prices(["VT", "AVUV"], start="2018-01-01")
+    monthly = get_prices(["VT"], period="5y", interval="1mo")
+    dividends = get_dividends("VT")
+
+    plan = DataPlan()
+    plan.add_prices("returns", ["AVUV", "VT"], start="2018-01-01")
+    plan.add_dividends("vt_dividends", "VT")
+    data = plan.fetch()  # one batched download for everything above
+
+    md = MarketData(source=CSVFixtureSource("fixtures/"), store=MemoryStore())
+"""
+
+import datetime
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume", "Dividends", "Stock Splits"]
+EARLIEST = pd.Timestamp("1900-01-01")
+DEFAULT_TTL = 3600  # seconds before the latest bar is refreshed
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "market_data", "market_data.sqlite")
+
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp(datetime.date.today())
+
+
+def _to_timestamp(value, default: pd.Timestamp) -> pd.Timestamp:
+    if value is None:
+        return default
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def period_start(period: str) -> pd.Timestamp | None:
+    """Translate a yfinance period string ('5y', '6mo', 'ytd', 'max', ...) into a start date."""
+    today = _today()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(today.year, 1, 1)
+    for suffix, unit in (("mo", "months"), ("wk", "weeks"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[: -len(suffix)])})
+    raise ValueError(f"unsupported period '{period}'")
+
+
+def _empty_bars() -> pd.DataFrame:
+    """No bars, with the same date index and columns as a stored frame."""
+    return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], dtype="datetime64[ns]", name="Date"), dtype=float)
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """Tz-naive date index, standard columns, no all-empty rows."""
+    frame = frame.copy()
+    frame.index = pd.DatetimeIndex(frame.index)
+    if frame.index.tz is not None:
+        frame.index = frame.index.tz_localize(None)
+    frame.index = frame.index.normalize()
+    frame.index.name = "Date"
+    frame = frame.reindex(columns=FIELDS)
+    frame[["Dividends", "Stock Splits"]] = frame[["Dividends", "Stock Splits"]].fillna(0.0)
+    frame = frame.dropna(subset=["Close"])
+    return frame[~frame.index.duplicated(keep="last")].sort_index()
+
+
+# ── Sources ──
+
+class YFinanceSource:
+    """Fetch bars (with dividend/split columns) from Yahoo Finance."""
+
+    def fetch(self, tickers: list[str], start, end, interval: str, auto_adjust: bool) -> dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        data = yf.download(
+            tickers, start=start, end=end, interval=interval, auto_adjust=auto_adjust,
+            actions=True, group_by="ticker", progress=False,
+        )
+        if data is None or data.empty:
+            return {}
+
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            frame = _normalize(frame)
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+class CSVFixtureSource:
+    """
+    Serve bars from ``<directory>/<TICKER>.csv`` files (a Date column plus any
+    of the standard fields), for tests and offline runs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.calls = []
+
+    def fetch(self, tickers: list[str], start, end, interval: str, auto_adjust: bool) -> dict[str, pd.DataFrame]:
+        self.calls.append((tuple(tickers), start, end, interval, auto_adjust))
+        frames = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            frame = _normalize(pd.read_csv(path, index_col="Date", parse_dates=True))
+            frame = frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+# ── Stores ──
+
+class MemoryStore:
+    """In-process store; nothing survives the process."""
+
+    def __init__(self):
+        self._bars = {}
+        self._coverage = {}
+
+    def coverage(self, key):
+        return self._coverage.get(key)
+
+    def load(self, key) -> pd.DataFrame:
+        return self._bars.get(key, _empty_bars()).copy()
+
+    def save(self, key, frame: pd.DataFrame, start, end, fetched_at: float, replace: bool = False):
+        if replace or key not in self._bars:
+            merged = frame
+        else:
+            merged = pd.concat([self._bars[key], frame])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self._bars[key] = merged
+        self._coverage[key] = (pd.Timestamp(start), pd.Timestamp(end), fetched_at)
+
+
+class SQLiteStore:
+    """Persistent store in a single SQLite file."""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get("MARKET_DATA_CACHE", DEFAULT_CACHE)
+        self._con = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS bars (ticker TEXT, interval TEXT, adjusted INTEGER, date TEXT, "
+                "open REAL, high REAL, low REAL, close REAL, adj_close REAL, volume REAL, "
+                "dividends REAL, splits REAL, PRIMARY KEY (ticker, interval, adjusted, date))"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS coverage (ticker TEXT, interval TEXT, adjusted INTEGER, "
+                "start TEXT, end TEXT, fetched_at REAL, PRIMARY KEY (ticker, interval, adjusted))"
+            )
+
+    def _connect(self):
+        if self._con is None:
+            self._con = sqlite3.connect(self.path)
+        return self._con
+
+    def coverage(self, key):
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT start, end, fetched_at FROM coverage WHERE ticker=? AND interval=? AND adjusted=?",
+                (key[0], key[1], int(key[2])),
+            ).fetchone()
+        if row is None:
+            return None
+        return pd.Timestamp(row[0]), pd.Timestamp(row[1]), row[2]
+
+    def load(self, key) -> pd.DataFrame:
+        with self._connect() as con:
+            frame = pd.read_sql_query(
+                "SELECT date, open, high, low, close, adj_close, volume, dividends, splits FROM bars "
+                "WHERE ticker=? AND interval=? AND adjusted=? ORDER BY date",
+                con, params=(key[0], key[1], int(key[2])), parse_dates=["date"], index_col="date",
+            )
+        frame.columns = FIELDS
+        frame.index.name = "Date"
+        return frame
+
+    def save(self, key, frame: pd.DataFrame, start, end, fetched_at: float, replace: bool = False):
+        ticker, interval, adjusted = key[0], key[1], int(key[2])
+        rows = [
+            (ticker, interval, adjusted, date.strftime("%Y-%m-%d"), *(None if pd.isna(v) else float(v) for v in values))
+            for date, values in zip(frame.index, frame[FIELDS].itertuples(index=False))
+        ]
+        with self._connect() as con:
+            if replace:
+                con.execute("DELETE FROM bars WHERE ticker=? AND interval=? AND adjusted=?", (ticker, interval, adjusted))
+            con.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            con.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+                (ticker, interval, adjusted, pd.Timestamp(start).strftime("%Y-%m-%d"),
+                 pd.Timestamp(end).strftime("%Y-%m-%d"), fetched_at),
+            )
+
+
+# ── Cache front end ──
+
+class MarketData:
+    def __init__(self, source=None, store=None, ttl: float = DEFAULT_TTL):
+        self.source = source or YFinanceSource()
+        self.store = store if store is not None else SQLiteStore()
+        self.ttl = ttl
+
+    def _missing_segments(self, key, start: pd.Timestamp, end: pd.Timestamp, now: float) -> list:
+        """The [fetch_start, fetch_end) windows needed to cover [start, end) for ``key``."""
+        cov = self.store.coverage(key)
+        if cov is None:
+            return [(start, end)]
+        cov_start, cov_end, fetched_at = cov
+
+        segments = []
+        if start < cov_start:
+            segments.append((start, cov_start))
+        if end > cov_end or (end >= _today() and now - fetched_at > self.ttl):
+            # Extend forward from the latest cached bar, which may still have been forming
+            bars = self.store.load(key)
+            last_bar = bars.index.max() if not bars.empty else cov_end
+            segments.append((min(cov_end, last_bar), max(end, cov_end)))
+        return segments
+
+    def ensure(self, tickers: list[str], start=None, end=None, interval: str = "1d", auto_adjust: bool = True):
+        """Make sure the cache covers [start, end) for every ticker, fetching only the gaps."""
+        tomorrow = _today() + pd.Timedelta(days=1)
+        start = _to_timestamp(start, EARLIEST)
+        end = min(_to_timestamp(end, tomorrow), tomorrow)
+        now = time.time()
+
+        # Group tickers that need the same download window into one request
+        plans = {}
+        for ticker in dict.fromkeys(tickers):
+            key = (ticker, interval, auto_adjust)
+            cov = self.store.coverage(key)
+            new_range = (start, end) if cov is None else (min(start, cov[0]), max(end, cov[1]))
+            for segment in self._missing_segments(key, start, end, now):
+                plans.setdefault(segment, []).append((key, new_range))
+
+        refetch = {}
+        for (fetch_start, fetch_end), entries in plans.items():
+            frames = self.source.fetch([key[0] for key, _ in entries], fetch_start, fetch_end, interval, auto_adjust)
+            for key, new_range in entries:
+                frame = frames.get(key[0], _empty_bars())
+                if self._history_rewritten(key, frame):
+                    refetch[key] = new_range
+                else:
+                    self.store.save(key, frame, *new_range, now)
+
+        for key, (new_start, new_end) in refetch.items():
+            frame = self.source.fetch([key[0]], new_start, new_end, interval, auto_adjust).get(key[0])
+            if frame is None:
+                frame = _empty_bars()
+            self.store.save(key, frame, new_start, new_end, now, replace=True)
+
+    def _history_rewritten(self, key, frame: pd.DataFrame) -> bool:
+        """True when new bars carry a split (or, for adjusted data, a dividend) past the cached history."""
+        cov = self.store.coverage(key)
+        if cov is None or frame.empty:
+            return False
+        bars = self.store.load(key)
+        if bars.empty:
+            return False
+        new = frame[frame.index > bars.index.max()]
+        events = new["Stock Splits"] != 0
+        if key[2]:
+            events |= new["Dividends"] != 0
+        return bool(events.any())
+
+    def _slice(self, ticker: str, start, end, interval: str, auto_adjust: bool) -> pd.DataFrame:
+        frame = self.store.load((ticker, interval, auto_adjust))
+        return frame[(frame.index >= _to_timestamp(start, EARLIEST)) & (frame.index < _to_timestamp(end, pd.Timestamp.max))]
+
+    def bars(self, ticker: str, start=None, end=None, interval: str = "1d", auto_adjust: bool = True) -> pd.DataFrame:
+        """All cached fields for one ticker over [start, end)."""
+        self.ensure([ticker], start, end, interval, auto_adjust)
+        return self._slice(ticker, start, end, interval, auto_adjust)
+
+    def _field(self, tickers: list[str], start, end, interval: str, auto_adjust: bool, field: str) -> pd.DataFrame:
+        columns = {t: self._slice(t, start, end, interval, auto_adjust)[field] for t in tickers}
+        return pd.DataFrame(columns).sort_index()
+
+    def _dividends(self, ticker: str, start, end) -> pd.Series:
+        bars = self._slice(ticker, start, end, "1d", True)
+        dividends = bars.loc[bars["Dividends"] != 0, "Dividends"]
+        dividends.name = "Dividends"
+        return dividends
+
+    def prices(self, tickers: list[str], start=None, end=None, period: str = None, interval: str = "1d",
+               auto_adjust: bool = True, field: str = "Close") -> pd.DataFrame:
+        """One ``field`` (default Close) for every ticker, as a date x ticker DataFrame."""
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        if period is not None:
+            start = period_start(period)
+        self.ensure(tickers, start, end, interval, auto_adjust)
+        return self._field(tickers, start, end, interval, auto_adjust, field)
+
+    def dividends(self, ticker: str, start=None, end=None) -> pd.Series:
+        """Cash dividends per share paid by ``ticker`` (ex-dividend dates, tz-naive)."""
+        self.ensure([ticker], start, end)
+        return self._dividends(ticker, start, end)
+
+
+class DataPlan:
+    """
+    Collects every series a run needs, loads them with one batched fetch per
+    (interval, adjustment) group covering the union of tickers and dates,
+    then fans the results out by name.  Dividends come from the same daily
+    bars as prices, so a ticker's prices and dividends cost one download.
+
+        plan = DataPlan()
+        plan.add_prices("regression", [stock, "VT"], start, end)
+        plan.add_dividends("vt_dividends", "VT")
+        data = plan.fetch()
+        data["regression"], data["vt_dividends"]
+    """
+
+    def __init__(self, market_data: MarketData = None):
+        self.market_data = market_data
+        self.requests = {}
+
+    def add_prices(self, name: str, tickers, start=None, end=None, period: str = None, interval: str = "1d",
+                   auto_adjust: bool = True, field: str = "Close") -> "DataPlan":
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        if period is not None:
+            start = period_start(period)
+        self.requests[name] = ("prices", list(tickers), start, end, interval, auto_adjust, field)
+        return self
+
+    def add_dividends(self, name: str, ticker: str, start=None, end=None) -> "DataPlan":
+        self.requests[name] = ("dividends", [ticker], start, end, "1d", True, "Dividends")
+        return self
+
+    def fetch(self) -> dict:
+        """Fetch everything planned and return ``{name: DataFrame or Series}``."""
+        md = self.market_data or default_market_data()
+
+        groups = {}
+        for _, tickers, start, end, interval, auto_adjust, _ in self.requests.values():
+            group = groups.setdefault((interval, auto_adjust), {"tickers": [], "start": [], "end": []})
+            group["tickers"].extend(tickers)
+            group["start"].append(_to_timestamp(start, EARLIEST))
+            group["end"].append(_to_timestamp(end, pd.Timestamp.max))
+        for (interval, auto_adjust), group in groups.items():
+            end = max(group["end"])
+            md.ensure(group["tickers"], min(group["start"]), None if end == pd.Timestamp.max else end,
+                      interval, auto_adjust)
+
+        results = {}
+        for name, (kind, tickers, start, end, interval, auto_adjust, field) in self.requests.items():
+            if kind == "dividends":
+                results[name] = md._dividends(tickers[0], start, end)
+            else:
+                results[name] = md._field(tickers, start, end, interval, auto_adjust, field)
+        return results
+
+
+def total_returns(prices: pd.DataFrame, dividends: dict, returns: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Simple returns plus dividend yield on ex-dividend dates.
+
+    ``dividends`` maps ticker -> dividend Series (e.g. from ``get_dividends``);
+    each is aligned onto the price index, divided by that day's price and
+    added to the returns in one operation.  Tickers without dividends, and
+    dividends on dates without a price, are left untouched.
+    """
+    if returns is None:
+        returns = prices.pct_change()
+    if not dividends:
+        return returns
+
+    paid = pd.DataFrame({t: d.groupby(level=0).sum() for t, d in dividends.items()})
+    paid = paid.reindex(index=prices.index, columns=prices.columns).fillna(0.0)
+    yields = (paid / prices).where(paid != 0, 0.0)
+    return returns + yields
+
+
+_default = None
+
+
+def default_market_data() -> MarketData:
+    """Process-wide ``MarketData`` using Yahoo Finance and the on-disk cache."""
+    global _default
+    if _default is None:
+        _default = MarketData()
+    return _default
+
+
+def get_prices(tickers, start=None, end=None, period: str = None, interval: str = "1d",
+               auto_adjust: bool = True, field: str = "Close") -> pd.DataFrame:
+    return default_market_data().prices(tickers, start, end, period, interval, auto_adjust, field)
+
+
+def get_dividends(ticker: str, start=None, end=None) -> pd.Series:
+    return default_market_data().dividends(ticker, start, end)
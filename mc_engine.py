@@ -0,0 +1,192 @@
+"""
+Vectorized Monte Carlo engine for bi-weekly contribution simulations
+
+Simulates the growth of a portfolio that receives a bi-weekly contribution,
+an employer match on a growing salary, and a quarterly dividend, with
+lognormal bi-weekly returns.  Paths are processed in fixed-size chunks:
+each chunk draws its whole (paths x periods) array of returns at once from a
+seeded ``np.random.Generator`` and collapses it to terminal values with array
+operations, so memory stays bounded no matter how many paths are requested.
+Blocks of chunks can be spread over several processes with ``workers`` (see
+``mc_parallel``), and ``simulate_stats`` reduces each block to a mergeable
+``StreamingStats`` so no run ever holds every final value.
+
+Usage:
+    from mc_engine import simulate_final_values, simulate_stats, summarize
+    finals = simulate_final_values(1_000_000, seed=42, workers=8, mu=0.004, sigma=0.03, ...)
+    summary = summarize(finals)
+
+    stats = simulate_stats(100_000_000, seed=42, workers=32, mu=0.004, ...)
+    summary = stats.summary()
+"""
+
+import numpy as np
+
+from mc_parallel import iter_sharded, run_sharded
+from streaming_stats import StreamingStats
+
+PERCENTILES = list(range(5, 100, 5))
+PERIODS_PER_YEAR = 24
+DIVIDEND_EVERY = 6
+
+DEFAULT_BLOCK_SIZE = 65536  # paths per seeded block (one task for a worker)
+DEFAULT_CHUNK_SIZE = 8192  # paths per draw within a block
+
+
+def contribution_schedule(
+    periods: int,
+    initial_contribution: float,
+    contribution_increase: float,
+    initial_salary: float,
+    salary_growth: float,
+    match_percentage: float,
+) -> np.ndarray:
+    """
+    Deterministic cash added at the end of each period (own contribution plus
+    employer match).  Contribution and salary step up every 24 periods.
+    """
+    year = np.arange(periods) // PERIODS_PER_YEAR
+    contribution = initial_contribution + contribution_increase * year
+    salary = initial_salary * salary_growth ** year
+    employer_match = salary * match_percentage / PERIODS_PER_YEAR
+    return contribution + employer_match
+
+
+def dividend_factors(periods: int, quarterly_yield: float) -> np.ndarray:
+    """Per-period growth factor from dividends: 1 + yield every sixth period, else 1."""
+    factors = np.ones(periods)
+    factors[DIVIDEND_EVERY - 1 :: DIVIDEND_EVERY] += quarterly_yield
+    return factors
+
+
+def _terminal_values(
+    rng: np.random.Generator,
+    n_paths: int,
+    initial_investment: float,
+    cash_flows: np.ndarray,
+    log_dividends: np.ndarray,
+    mu: float,
+    sigma: float,
+) -> np.ndarray:
+    """
+    Terminal values for one chunk.
+
+    Each period is V <- (V * r + c) * d, so the terminal value is
+    V0 * G_0 + sum_i c_i * d_i * G_{i+1}, where G_k is the product of every
+    growth factor r_j * d_j from period k onward.  Columns of the draw block
+    are laid out last period first, so G is a plain cumulative sum in log
+    space along each row.
+    """
+    log_growth = rng.standard_normal((n_paths, cash_flows.size))
+    log_growth *= sigma
+    log_growth += mu + log_dividends[::-1]
+
+    # Column j holds log G_{periods-1-j}
+    tail = np.cumsum(log_growth, axis=1, out=log_growth)
+    np.exp(tail, out=tail)
+
+    adjusted_flows = cash_flows * np.exp(log_dividends)
+    finals = initial_investment * tail[:, -1]
+    finals += tail[:, :-1] @ adjusted_flows[-2::-1]
+    finals += adjusted_flows[-1]
+    return finals
+
+
+def _iter_chunks(
+    seed_seq,
+    n_paths: int,
+    chunk_size: int,
+    *,
+    initial_investment: float,
+    initial_contribution: float,
+    contribution_increase: float,
+    initial_salary: float,
+    salary_growth: float,
+    match_percentage: float,
+    periods: int,
+    mu: float,
+    sigma: float,
+    quarterly_yield: float,
+):
+    """Yield final values (clipped at 0) for one block, ``chunk_size`` paths at a time."""
+    rng = np.random.default_rng(seed_seq)
+    cash_flows = contribution_schedule(
+        periods, initial_contribution, contribution_increase,
+        initial_salary, salary_growth, match_percentage,
+    )
+    log_dividends = np.log(dividend_factors(periods, quarterly_yield))
+    for start in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - start)
+        finals = _terminal_values(rng, n, initial_investment, cash_flows, log_dividends, mu, sigma)
+        yield np.clip(finals, 0, None)
+
+
+def simulate_block(seed_seq, n_paths: int, chunk_size: int = DEFAULT_CHUNK_SIZE, **params) -> np.ndarray:
+    """Final values for one block of paths drawn from ``seed_seq``."""
+    chunks = list(_iter_chunks(seed_seq, n_paths, chunk_size, **params))
+    return np.concatenate(chunks) if chunks else np.empty(0)
+
+
+def simulate_stats_block(seed_seq, n_paths: int, chunk_size: int = DEFAULT_CHUNK_SIZE, **params) -> StreamingStats:
+    """Streaming statistics for one block of paths drawn from ``seed_seq``."""
+    stats = StreamingStats()
+    for finals in _iter_chunks(seed_seq, n_paths, chunk_size, **params):
+        stats.update(finals)
+    return stats
+
+
+def simulate_final_values(
+    n_paths: int,
+    *,
+    seed=None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = 1,
+    **params,
+) -> np.ndarray:
+    """
+    Simulate ``n_paths`` portfolios and return their final values (clipped at 0).
+
+    Returns per period are lognormal(mean=mu, sigma=sigma); ``params`` are the
+    keyword arguments of ``_iter_chunks``.  Each block of paths is seeded from
+    its own child of ``seed``, so the result does not depend on ``workers``.
+    Peak working memory per worker is about ``chunk_size * periods`` doubles.
+    """
+    blocks = run_sharded(
+        simulate_block, n_paths, seed=seed, block_size=block_size, workers=workers,
+        chunk_size=chunk_size, **params,
+    )
+    return np.concatenate(blocks) if blocks else np.empty(0)
+
+
+def simulate_stats(
+    n_paths: int,
+    *,
+    seed=None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = 1,
+    **params,
+) -> StreamingStats:
+    """
+    Like ``simulate_final_values`` but never holds the final values: each block
+    is reduced to a ``StreamingStats`` in its worker and merged in block order,
+    so memory stays constant however many paths are run.
+    """
+    stats = StreamingStats()
+    for block_stats in iter_sharded(
+        simulate_stats_block, n_paths, seed=seed, block_size=block_size, workers=workers,
+        chunk_size=chunk_size, **params,
+    ):
+        stats.merge(block_stats)
+    return stats
+
+
+def summarize(final_values: np.ndarray, percentiles=PERCENTILES) -> dict:
+    """Mean, median, standard deviation and percentiles of the final values."""
+    return {
+        "mean": final_values.mean(),
+        "median": np.median(final_values),
+        "std": final_values.std(),
+        "percentiles": dict(zip(percentiles, np.percentile(final_values, percentiles))),
+    }
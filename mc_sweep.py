@@ -0,0 +1,200 @@
+"""
+Parameter sweep for the monte_carlo.py A-vs-B comparison
+
+Evaluates a grid of (cagr_A, vol_A, cagr_B, vol_B, years) points against one
+shared block of standard-normal shocks: each chunk of paths is drawn once at
+the longest horizon and every grid point only scales/shifts it (and uses its
+first ``years`` columns).  An N-point sweep therefore costs roughly one draw
+plus N cheap transforms, and every point sees the same random numbers, which
+also makes neighbouring points directly comparable.
+
+The grid comes either from a CSV with columns cagr_a, vol_a, cagr_b, vol_b
+and (optionally) years, all rates in percent, or from the cartesian product
+of values given on the command line.  Results are written as a table of
+prob_A_higher, means and percentile bands, and optionally drawn as a heatmap
+of prob_A_higher over two of the grid axes.
+
+Usage:
+    python mc_sweep.py --cagr-a 7 --vol-a 12 --cagr-b 7 8 9 10 --vol-b 14 16 18 20 --out sweep.csv
+    python mc_sweep.py --grid grid.csv --antithetic --heatmap cagr_b vol_b
+"""
+
+import argparse
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+
+from mc_parallel import iter_sharded
+from monte_carlo import BLOCK_SIZE, CHUNK_SIZE, draw_shocks, terminal_values
+from streaming_stats import StreamingStats
+
+GRID_COLUMNS = ["cagr_a", "vol_a", "cagr_b", "vol_b", "years"]
+BANDS = [5, 25, 50, 75, 95]
+
+
+def load_grid(path: str, default_years: int) -> pd.DataFrame:
+    """Read a sweep grid from CSV (rates in percent)."""
+    grid = pd.read_csv(path)
+    grid.columns = [c.strip().lower() for c in grid.columns]
+    if "years" not in grid.columns:
+        grid["years"] = default_years
+    missing = [c for c in GRID_COLUMNS if c not in grid.columns]
+    if missing:
+        sys.exit(f"Error: grid file is missing column(s) {', '.join(missing)}")
+    return grid[GRID_COLUMNS]
+
+
+def product_grid(cagr_a, vol_a, cagr_b, vol_b, years) -> pd.DataFrame:
+    """Cartesian product of the given values (rates in percent)."""
+    return pd.DataFrame(list(itertools.product(cagr_a, vol_a, cagr_b, vol_b, years)), columns=GRID_COLUMNS)
+
+
+def sweep_block(seed_seq, n_paths, points, initial_value, correlation=0.0, antithetic=False,
+                chunk_size=CHUNK_SIZE):
+    """
+    Per-point (stats_A, stats_B, a_higher) for one block of paths.  ``points``
+    holds (cagr_A, vol_A, cagr_B, vol_B, years) tuples with decimal rates.
+    """
+    rng = np.random.default_rng(seed_seq)
+    max_years = max(p[4] for p in points)
+    results = [(StreamingStats(), StreamingStats(), 0) for _ in points]
+
+    for start in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - start)
+        z_A, z_B = draw_shocks(rng, n, max_years, correlation, antithetic)
+
+        for i, (cagr_A, vol_A, cagr_B, vol_B, years) in enumerate(points):
+            value_A = terminal_values(initial_value, cagr_A + vol_A * z_A[:, :years])
+            value_B = terminal_values(initial_value, cagr_B + vol_B * z_B[:, :years])
+            stats_A, stats_B, a_higher = results[i]
+            stats_A.update(value_A)
+            stats_B.update(value_B)
+            results[i] = (stats_A, stats_B, a_higher + int(np.sum(value_A > value_B)))
+
+    return results
+
+
+def run_sweep(
+    grid: pd.DataFrame,
+    initial_value: float = 54493.92,
+    num_simulations: int = 200_000,
+    seed=42,
+    correlation: float = 0.0,
+    antithetic: bool = False,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Evaluate every grid row (rates in percent) and return the grid with
+    prob_A_higher, means and percentile bands appended.
+    """
+    if num_simulations <= 0:
+        raise ValueError("num_simulations must be > 0")
+    if grid.empty:
+        columns = ["prob_A_higher", "mean_A", "mean_B"] + [f"p{p}_{label}" for label in "AB" for p in BANDS]
+        return pd.concat([grid.reset_index(drop=True), pd.DataFrame(columns=columns, dtype=float)], axis=1)
+
+    points = [
+        (row.cagr_a / 100, row.vol_a / 100, row.cagr_b / 100, row.vol_b / 100, int(row.years))
+        for row in grid.itertuples(index=False)
+    ]
+
+    totals = None
+    for block in iter_sharded(
+        sweep_block, num_simulations, seed=seed, block_size=BLOCK_SIZE, workers=workers,
+        points=points, initial_value=initial_value, correlation=correlation, antithetic=antithetic,
+    ):
+        if totals is None:
+            totals = block
+            continue
+        totals = [
+            (sa.merge(ba), sb.merge(bb), n + bn)
+            for (sa, sb, n), (ba, bb, bn) in zip(totals, block)
+        ]
+
+    rows = []
+    for stats_A, stats_B, a_higher in totals:
+        row = {
+            "prob_A_higher": a_higher / num_simulations,
+            "mean_A": stats_A.mean,
+            "mean_B": stats_B.mean,
+        }
+        for label, stats in (("A", stats_A), ("B", stats_B)):
+            for p, value in zip(BANDS, stats.percentiles(BANDS)):
+                row[f"p{p}_{label}"] = value
+        rows.append(row)
+
+    return pd.concat([grid.reset_index(drop=True), pd.DataFrame(rows)], axis=1)
+
+
+def plot_heatmap(results: pd.DataFrame, x: str, y: str):
+    """Heatmap of prob_A_higher over two grid axes (averaged over the others)."""
+    import matplotlib.pyplot as plt
+
+    surface = results.pivot_table(index=y, columns=x, values="prob_A_higher", aggfunc="mean")
+    plt.figure(figsize=(10, 7))
+    plt.imshow(surface.values, origin="lower", aspect="auto", cmap="RdBu", vmin=0, vmax=1)
+    plt.colorbar(label="P(Portfolio A ends higher)")
+    plt.xticks(range(len(surface.columns)), [f"{v:g}" for v in surface.columns])
+    plt.yticks(range(len(surface.index)), [f"{v:g}" for v in surface.index])
+    for (i, j), value in np.ndenumerate(surface.values):
+        plt.text(j, i, f"{value:.0%}", ha="center", va="center", fontsize=8)
+    plt.xlabel(f"{x} (%)" if x != "years" else x)
+    plt.ylabel(f"{y} (%)" if y != "years" else y)
+    plt.title("Monte Carlo Sweep: Probability Portfolio A Ends Higher")
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep the monte_carlo.py A-vs-B comparison over a parameter grid.",
+        epilog="Example:  python mc_sweep.py --cagr-a 7 --vol-a 12 --cagr-b 8 9 10 --vol-b 16 20 --out sweep.csv",
+    )
+    parser.add_argument("--grid", help="CSV with columns cagr_a, vol_a, cagr_b, vol_b[, years] in percent")
+    parser.add_argument("--cagr-a", type=float, nargs="+", help="CAGR values for Portfolio A in percent")
+    parser.add_argument("--vol-a", type=float, nargs="+", help="Volatility values for Portfolio A in percent")
+    parser.add_argument("--cagr-b", type=float, nargs="+", help="CAGR values for Portfolio B in percent")
+    parser.add_argument("--vol-b", type=float, nargs="+", help="Volatility values for Portfolio B in percent")
+    parser.add_argument("--years", type=int, nargs="+", default=[28], help="Horizons in years (default: 28)")
+    parser.add_argument("--initial-value", type=float, default=54493.92, help="Starting value (default: 54493.92)")
+    parser.add_argument("--simulations", type=int, default=200_000, help="Paths per grid point (default: 200000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--correlation", type=float, default=0.0,
+                        help="Correlation of A and B annual shocks; 1 = common random numbers (default: 0)")
+    parser.add_argument("--antithetic", action="store_true", help="Use antithetic variates")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", help="Write the results table to this CSV file")
+    parser.add_argument("--heatmap", nargs=2, metavar=("X", "Y"), choices=GRID_COLUMNS,
+                        help="Plot prob_A_higher over two grid columns, e.g. cagr_b vol_b")
+    args = parser.parse_args()
+
+    if args.grid:
+        grid = load_grid(args.grid, args.years[0])
+    else:
+        axes = [args.cagr_a, args.vol_a, args.cagr_b, args.vol_b]
+        if any(a is None for a in axes):
+            sys.exit("Error: give --grid or all of --cagr-a, --vol-a, --cagr-b, --vol-b")
+        grid = product_grid(*axes, args.years)
+
+    print(f"Sweeping {len(grid)} grid points x {args.simulations:,} paths ...")
+    results = run_sweep(
+        grid, initial_value=args.initial_value, num_simulations=args.simulations, seed=args.seed,
+        correlation=args.correlation, antithetic=args.antithetic, workers=args.workers,
+    )
+
+    with pd.option_context("display.max_rows", None, "display.width", 200,
+                           "display.float_format", "{:,.4f}".format):
+        print(results[GRID_COLUMNS + ["prob_A_higher", "mean_A", "mean_B"]].to_string(index=False))
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\nResults saved to {args.out}")
+
+    if args.heatmap:
+        plot_heatmap(results, *args.heatmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 # ncsrcp.py
 import csv
+import heapq
 import math
 from collections import defaultdict, Counter
+from functools import lru_cache
 from prompt_toolkit import prompt
 from prompt_toolkit.completion import WordCompleter
 
@@ -94,8 +96,15 @@ def round_multiplier(round_number):
 def duplicate_multiplier(prior_picks):
     return max(0.0, 1.0 - 0.25*prior_picks)
 
+def competition_style(competition):
+    if "World Cup" in competition or "Champions" in competition or "NCAA" in competition:
+        return "tournament"
+    return "league"
+
 def expand_pchamp_to_outcomes(p_champ, competition_style="tournament", overrides=None):
-    conf = OPTIONB_DEFAULTS[competition_style].copy()
+    # Copy the nested k map too, so overrides never leak into OPTIONB_DEFAULTS
+    defaults = OPTIONB_DEFAULTS[competition_style]
+    conf = {"stages_ordered": list(defaults["stages_ordered"]), "k": dict(defaults["k"]), "gamma": defaults["gamma"]}
     if overrides:
         if "gamma" in overrides: conf["gamma"] = overrides["gamma"]
         if "k" in overrides: conf["k"].update(overrides["k"])
@@ -137,6 +146,32 @@ def expand_pchamp_to_outcomes(p_champ, competition_style="tournament", overrides
             exact[s] = 0.0
     return exact
 
+def _freeze(overrides):
+    # Hashable form of an overrides dict, for the LRU cache key
+    if not overrides:
+        return None
+    return tuple(sorted(
+        (key, tuple(value) if key == "stages_ordered" else
+              tuple(sorted(value.items())) if key == "k" else value)
+        for key, value in overrides.items()
+    ))
+
+@lru_cache(maxsize=4096)
+def _expected_base_points(p_champ, competition, frozen_overrides):
+    overrides = None
+    if frozen_overrides:
+        overrides = {key: list(value) if key == "stages_ordered" else dict(value) if key == "k" else value
+                     for key, value in frozen_overrides}
+    base_map = COMPETITION_BASE_POINTS.get(competition)
+    if base_map is None:
+        raise KeyError(f"No base points for competition '{competition}'")
+    stage_probs = expand_pchamp_to_outcomes(p_champ, competition_style(competition), overrides)
+    return sum(prob*base_map.get(stage,0.0) for stage, prob in stage_probs.items())
+
+def expected_base_points(p_champ, competition, overrides=None):
+    """Expected base points of a team with normalized p_champ; cached per (p_champ, competition, overrides)."""
+    return _expected_base_points(p_champ, competition, _freeze(overrides))
+
 # -----------------------
 # Draft Tracker Class
 # -----------------------
@@ -151,26 +186,74 @@ class DraftTracker:
         self.picks_count = Counter()
         self.mine = defaultdict(set)
 
+        # competition -> team ids, and each team's p_champ normalized within its
+        # competition (fixed for the whole draft, so computed once here)
+        self.comp_index = defaultdict(list)
+        for tid, meta in teams.items():
+            self.comp_index[meta["competition"]].append(tid)
+        self.p_norm = {}
+        for comp, tids in self.comp_index.items():
+            total = sum(teams[tid]["p_champ"] for tid in tids)
+            for tid in tids:
+                self.p_norm[tid] = teams[tid]["p_champ"]/total if total>0 else 0.0
+
+        # competition -> sum of p_norm over the teams I own, kept up to date by register_pick
+        self.owned_mass = defaultdict(float)
+
+        # Expected base points and league value never change during a draft
+        self.e_base = {tid: expected_base_points(self.p_norm[tid], meta["competition"])
+                       for tid, meta in teams.items()}
+        self.league_values = {
+            comp: league_value(competition_contenders.get(
+                comp, len(OPTIONB_DEFAULTS[competition_style(comp)]["stages_ordered"])))
+            for comp in self.comp_index
+        }
+
+        # Each competition's teams ordered by the round-independent part of
+        # their score.  Ownership scales every available team of a competition
+        # by the same factor and taking a team only removes it, so this order
+        # never changes; a per-competition cursor skips taken teams lazily.
+        self._comp_order = {
+            comp: sorted(tids, key=self._static_score, reverse=True)
+            for comp, tids in self.comp_index.items()
+        }
+        self._comp_cursor = dict.fromkeys(self.comp_index, 0)
+
+    def _static_score(self, team_id):
+        comp = self.teams[team_id]["competition"]
+        return (self.e_base[team_id] * self.p_norm[team_id] * self.league_values[comp]
+                * duplicate_multiplier(self.picks_count[team_id]))
+
+    def _ownership_factor(self, comp):
+        # p_mine / p_avail for any team of comp that I do not own
+        return max(0.0, 1 - self.owned_mass[comp]) if self.mine[comp] else 1.0
+
+    def _head(self, comp):
+        order, cursor = self._comp_order[comp], self._comp_cursor[comp]
+        while cursor < len(order) and order[cursor] in self.taken:
+            cursor += 1
+        self._comp_cursor[comp] = cursor
+        return order[cursor] if cursor < len(order) else None
+
     def register_pick(self, team_id, by_me=False, round_number=None):
         self.taken.add(team_id)
         self.rounds[team_id] = round_number
         self.picks_count[team_id] += 1
         if by_me:
             comp = self.teams[team_id]["competition"]
-            self.mine[comp].add(team_id)
+            if team_id not in self.mine[comp]:
+                self.mine[comp].add(team_id)
+                self.owned_mass[comp] += self.p_norm[team_id]
 
     def available_teams(self, competition=None):
         if competition:
-            return [tid for tid,meta in self.teams.items()
-                    if tid not in self.taken and meta["competition"]==competition]
+            return [tid for tid in self.comp_index.get(competition, []) if tid not in self.taken]
         else:
             return [tid for tid in self.teams if tid not in self.taken]
 
     def p_avail(self, team_id):
         # unconditional probability relative to all teams in the competition
-        comp = self.teams[team_id]["competition"]
-        total = sum(self.teams[tid]["p_champ"] for tid in self.teams if self.teams[tid]["competition"]==comp)
-        return self.teams[team_id]["p_champ"]/total if total>0 else 0.0
+        return self.p_norm[team_id]
 
     def p_mine(self, team_id):
         comp = self.teams[team_id]["competition"]
@@ -178,42 +261,54 @@ class DraftTracker:
         p_this = self.p_avail(team_id)
         if not existing:
             return p_this
-        deduction = sum(self.p_avail(tid) for tid in existing if tid != team_id)
+        deduction = self.owned_mass[comp] - (p_this if team_id in existing else 0.0)
         return max(0.0, p_this * (1 - deduction))
 
-    def expected_points(self, team_id, round_number):
-        p_mine = self.p_mine(team_id)
-        E_base = 0.0
+    def expected_points(self, team_id, round_number, overrides=None):
         comp = self.teams[team_id]["competition"]
-
-        if "World Cup" in comp or "Champions" in comp or "NCAA" in comp:
-            style = "tournament"
+        if overrides:
+            E_base = expected_base_points(self.p_norm[team_id], comp, overrides)
         else:
-            style = "league"
-
-        stage_probs = expand_pchamp_to_outcomes(self.p_avail(team_id), competition_style=style)
-        base_map = COMPETITION_BASE_POINTS.get(comp)
-        if base_map is None:
-            raise KeyError(f"No base points for competition '{comp}'")
-        for stage, prob in stage_probs.items():
-            base = base_map.get(stage,0.0)
-            E_base += prob*base
+            E_base = self.e_base[team_id]
 
-        L = league_value(self.comp_contenders.get(comp,len(stage_probs)))
         R = round_multiplier(round_number)
         D = duplicate_multiplier(self.picks_count[team_id])
-        return E_base * p_mine * L * R * D
-
-    def recommend_greedy(self, round_number, top_n=10):
-        avail = self.available_teams()
-        recs = []
-        for tid in avail:
-            val = self.expected_points(tid, round_number)
-            recs.append({"team_id":tid, "team_name":self.teams[tid]["name"],
-                         "competition":self.teams[tid]["competition"],
-                         "expected_points":val})
-        recs.sort(key=lambda x: x["expected_points"], reverse=True)
-        return recs[:top_n]
+        return E_base * self.p_mine(team_id) * self.league_values[comp] * R * D
+
+    def recommend_greedy(self, round_number, top_n=10, overrides=None):
+        if overrides:
+            # Override scenarios change the per-team order, so score every team
+            avail = self.available_teams()
+            scored = ((self.expected_points(tid, round_number, overrides), tid) for tid in avail)
+            best = heapq.nlargest(top_n, scored, key=lambda x: x[0])
+        else:
+            best = self._top_available(top_n, round_multiplier(round_number))
+        return [{"team_id":tid, "team_name":self.teams[tid]["name"],
+                 "competition":self.teams[tid]["competition"],
+                 "expected_points":val} for val, tid in best]
+
+    def _top_available(self, top_n, round_mult):
+        # Merge the competitions' orders: a heap of each competition's best
+        # available team, refilled from that competition as teams are popped
+        heap = []
+        for comp in self._comp_order:
+            tid = self._head(comp)
+            if tid is not None:
+                heap.append((-self._static_score(tid) * self._ownership_factor(comp), comp, self._comp_cursor[comp]))
+        heapq.heapify(heap)
+
+        best = []
+        while heap and len(best) < top_n:
+            neg_score, comp, position = heapq.heappop(heap)
+            order = self._comp_order[comp]
+            best.append((-neg_score * round_mult, order[position]))
+            position += 1
+            while position < len(order) and order[position] in self.taken:
+                position += 1
+            if position < len(order):
+                score = self._static_score(order[position]) * self._ownership_factor(comp)
+                heapq.heappush(heap, (-score, comp, position))
+        return best
 
 # -----------------------
 # CSV Loader
@@ -246,7 +341,8 @@ def name_to_id(teams, name):
 # -----------------------
 # Live Draft Assistant
 # -----------------------
-def live_draft_assistant(teams_csv, my_player_id, comp_contenders):
+def live_draft_assistant(teams_csv, my_player_id, comp_contenders, draft_order=None):
+    # draft_order: (n_drafters, my_slot, n_rounds) for 'sim'; asked for on first use if None
     teams = load_teams_from_csv(teams_csv)
     tracker = DraftTracker(teams, my_player_id, comp_contenders)
 
@@ -254,10 +350,11 @@ def live_draft_assistant(teams_csv, my_player_id, comp_contenders):
     current_round = 1
 
     print("Live Draft Assistant Started!")
-    print("Commands: 'next' = show top picks, 'pick' = register pick, 'round' = advance round, 'exit' = quit\n")
+    print("Commands: 'next' = show top picks, 'sim' = simulate the rest of the draft, 'pick' = register pick, "
+          "'round' = advance round, 'exit' = quit\n")
 
     while True:
-        cmd = input("Command (next/pick/round/exit): ").strip().lower()
+        cmd = input("Command (next/sim/pick/round/exit): ").strip().lower()
         if cmd == "exit":
             break
         elif cmd == "next":
@@ -266,6 +363,29 @@ def live_draft_assistant(teams_csv, my_player_id, comp_contenders):
             for r in recs:
                 print(f"{r['team_name']} ({r['competition']})")
             print("")
+        elif cmd == "sim":
+            from draft_sim import simulate_draft
+            if draft_order is None:
+                try:
+                    draft_order = (int(input("Number of drafters: ")), int(input("Your draft slot (1 = first): ")),
+                                   int(input("Number of rounds: ")))
+                except ValueError:
+                    print("Enter whole numbers.\n")
+                    continue
+                if not (draft_order[0] > 0 and 1 <= draft_order[1] <= draft_order[0] and draft_order[2] > 0):
+                    print("Need at least one drafter and round, and a slot between 1 and the number of drafters.\n")
+                    draft_order = None
+                    continue
+            n_drafters, my_slot, n_rounds = draft_order
+            try:
+                recs = simulate_draft(tracker, n_drafters, my_slot, n_rounds)
+            except ValueError as e:
+                print(f"{e}\n")
+                continue
+            print("\nSimulated picks (expected points to the end of the draft):")
+            for r in recs:
+                print(f"{r['team_name']} ({r['competition']}): {r['expected_total']:.1f} +/- {r['std_error']:.1f}")
+            print("")
         elif cmd == "pick":
             team_name = prompt("Enter picked team name: ", completer=team_completer).strip()
             by_me = input("Was this you? (y/n): ").strip().lower() == "y"
@@ -279,7 +399,7 @@ def live_draft_assistant(teams_csv, my_player_id, comp_contenders):
             current_round += 1
             print(f"Advanced to round {current_round}\n")
         else:
-            print("Unknown command. Use next/pick/round/exit.\n")
+            print("Unknown command. Use next/sim/pick/round/exit.\n")
 
 # -----------------------
 # Main
@@ -0,0 +1,162 @@
+"""
+Rolling-window OLS from running sums
+
+Fits y = X b over every trailing window of ``window`` observations in one
+pass.  Instead of refitting a model per window, the cross-products X'X, X'y
+and y'y are accumulated as cumulative sums, so each window's normal
+equations are a difference of two running sums and all windows are solved
+together as one batched linear solve.
+
+With a constant, the data are centered on their full-sample means before
+accumulating, which keeps the running sums small and the normal equations
+well conditioned; the intercept is recovered afterwards.  Without one the
+fit goes through the origin and R² is uncentered, as in statsmodels.
+Windows whose normal equations are still ill-conditioned (or singular,
+e.g. a flat regressor) fall back to a direct ``lstsq`` on the window's raw
+data.
+
+``RollingOLS`` is the incremental form for live monitoring: it adds the
+newest observation to the sums and subtracts the one leaving the window,
+and rebuilds the sums from its buffer every ``refresh`` updates so
+floating-point drift cannot accumulate.
+
+Usage:
+    from rolling import rolling_ols
+    fits = rolling_ols(excess_returns, factors, window=36)   # const, factor betas, r_squared
+
+    model = RollingOLS(n_features=1, window=252)
+    for x, y in stream:
+        params = model.update(x, y)   # None until the window is full
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+COND_LIMIT = 1e10  # condition number above which a window is refit with lstsq
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums over every trailing window (rows window-1 .. n-1) via one cumulative sum."""
+    totals = np.cumsum(values, axis=0)
+    sums = totals[window - 1:].copy()
+    sums[1:] -= totals[:-window]
+    return sums
+
+
+def _solve_normal_equations(xtx: np.ndarray, xty: np.ndarray):
+    """Batched solve of xtx b = xty; returns params and a mask of windows that need a fallback."""
+    cond = np.linalg.cond(xtx)
+    bad = ~np.isfinite(cond) | (cond > COND_LIMIT)
+    params = np.full(xty.shape, np.nan)
+    if (~bad).any():
+        params[~bad] = np.linalg.solve(xtx[~bad], xty[~bad][..., None])[..., 0]
+    return params, bad
+
+
+def rolling_ols(y, X, window: int, add_constant: bool = True) -> pd.DataFrame:
+    """
+    Parameters and R² of an OLS of ``y`` on ``X`` over every trailing window.
+
+    Rows are aligned on the index and any row with a missing value is
+    dropped first.  The result is indexed by each window's last date, with
+    one column per regressor (``const`` first when ``add_constant``) plus
+    ``r_squared``; dates before the first full window are omitted.
+    """
+    X = X.to_frame() if isinstance(X, pd.Series) else X
+    data = pd.concat([y.rename("__y__"), X], axis=1, join="inner").dropna()
+    names = (["const"] if add_constant else []) + list(X.columns)
+    if len(data) < window:
+        return pd.DataFrame(columns=names + ["r_squared"], dtype=float)
+
+    y_raw = data["__y__"].to_numpy(dtype=float)
+    x_raw = data[X.columns].to_numpy(dtype=float)
+    if add_constant:
+        x_raw = np.column_stack([np.ones(len(x_raw)), x_raw])
+
+    # With a constant, center everything but the constant on its full-sample
+    # mean; without one the model goes through the origin, so no centering
+    y_mean = 0.0
+    x_mean = np.zeros(x_raw.shape[1])
+    if add_constant:
+        y_mean = y_raw.mean()
+        x_mean = x_raw.mean(axis=0)
+        x_mean[0] = 0.0
+    yc, xc = y_raw - y_mean, x_raw - x_mean
+
+    xtx = _window_sums(xc[:, :, None] * xc[:, None, :], window)
+    xty = _window_sums(xc * yc[:, None], window)
+    yty = _window_sums(yc * yc, window)
+    y_sum = _window_sums(yc, window)
+
+    params, bad = _solve_normal_equations(xtx, xty)
+    rss = yty - np.einsum("ij,ij->i", params, xty)
+    # Centered total sum of squares with a constant, uncentered without (as statsmodels)
+    tss = yty - y_sum**2 / window if add_constant else yty
+
+    for i in np.flatnonzero(bad):
+        rows = slice(i, i + window)
+        params[i] = np.linalg.lstsq(xc[rows], yc[rows], rcond=None)[0]
+        resid = yc[rows] - xc[rows] @ params[i]
+        rss[i] = resid @ resid
+
+    # Undo the centering: y - my = b'(x - mx)  =>  const = my - b'mx (+ centered const)
+    if add_constant:
+        params[:, 0] += y_mean - params[:, 1:] @ x_mean[1:]
+
+    result = pd.DataFrame(params, index=data.index[window - 1:], columns=names)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["r_squared"] = 1 - rss / tss
+    return result
+
+
+class RollingOLS:
+    """Incremental rolling OLS over the last ``window`` observations."""
+
+    def __init__(self, n_features: int, window: int, add_constant: bool = True, refresh: int = None):
+        self.window = window
+        self.add_constant = add_constant
+        self.refresh = refresh or 10 * window
+        k = n_features + int(add_constant)
+        self._buffer = deque(maxlen=window)
+        self._xtx = np.zeros((k, k))
+        self._xty = np.zeros(k)
+        self._updates = 0
+
+    def _row(self, x) -> np.ndarray:
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        return np.concatenate([[1.0], x]) if self.add_constant else x
+
+    def _rebuild(self):
+        rows = np.array([row for row, _ in self._buffer])
+        ys = np.array([y for _, y in self._buffer])
+        self._xtx = rows.T @ rows
+        self._xty = rows.T @ ys
+
+    def update(self, x, y: float) -> np.ndarray | None:
+        """Add one observation; returns the window's parameters once it is full."""
+        row = self._row(x)
+        if len(self._buffer) == self.window:
+            old_row, old_y = self._buffer[0]
+            self._xtx -= np.outer(old_row, old_row)
+            self._xty -= old_row * old_y
+        self._buffer.append((row, float(y)))
+        self._xtx += np.outer(row, row)
+        self._xty += row * y
+
+        self._updates += 1
+        if self._updates % self.refresh == 0:
+            self._rebuild()
+        if len(self._buffer) < self.window:
+            return None
+        return self.params
+
+    @property
+    def params(self) -> np.ndarray:
+        """Parameters of the current window (constant first when ``add_constant``)."""
+        if np.linalg.cond(self._xtx) <= COND_LIMIT:
+            return np.linalg.solve(self._xtx, self._xty)
+        rows = np.array([row for row, _ in self._buffer])
+        ys = np.array([y for _, y in self._buffer])
+        return np.linalg.lstsq(rows, ys, rcond=None)[0]
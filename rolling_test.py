@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.regression.rolling import RollingOLS as SMRollingOLS
+
+from rolling import RollingOLS, rolling_ols
+
+
+@pytest.mark.parametrize("add_constant", [True, False])
+def test_rolling_ols_matches_statsmodels(add_constant):
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2020-01-01", periods=300, freq="B")
+    X = pd.DataFrame(rng.normal(0.01, 0.02, (300, 2)), index=index, columns=["mkt", "smb"])
+    y = pd.Series(0.002 + X @ [1.2, -0.4] + rng.normal(0, 0.01, 300), index=index)
+
+    fits = rolling_ols(y, X, window=60, add_constant=add_constant)
+
+    exog = X.assign(const=1.0)[["const", "mkt", "smb"]] if add_constant else X
+    expected = SMRollingOLS(y, exog, window=60).fit()
+    np.testing.assert_allclose(fits[exog.columns].to_numpy(), expected.params.dropna().to_numpy(), atol=1e-10)
+    np.testing.assert_allclose(fits["r_squared"].to_numpy(), expected.rsquared.dropna().to_numpy(), atol=1e-10)
+
+
+@pytest.mark.parametrize("add_constant", [True, False])
+def test_incremental_rolling_ols_matches_batch(add_constant):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(0.01, 0.02, (200, 2)), columns=["mkt", "smb"])
+    y = pd.Series(0.002 + X @ [1.2, -0.4] + rng.normal(0, 0.01, 200))
+    model = RollingOLS(n_features=2, window=40, add_constant=add_constant, refresh=25)
+
+    params = [model.update(x, target) for x, target in zip(X.to_numpy(), y)]
+
+    assert all(p is None for p in params[:39])
+    columns = ["const", "mkt", "smb"] if add_constant else ["mkt", "smb"]
+    expected = rolling_ols(y, X, window=40, add_constant=add_constant)[columns].to_numpy()
+    np.testing.assert_allclose(np.array(params[39:]), expected, atol=1e-10)
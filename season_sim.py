@@ -0,0 +1,285 @@
+"""
+Season outcome simulator for ncsrcp.py
+
+``expand_pchamp_to_outcomes`` turns each team's champion probability into
+stage probabilities with heuristic ``k`` / ``gamma`` constants.  This
+simulator instead samples whole seasons: every competition's teams are
+ranked with a Plackett-Luce draw on their normalized ``champ_prob`` (an
+exponential race: sort ``E / p`` with ``E ~ Exp(1)``), so exactly one team
+wins each competition and wins it with probability ``p``.  The ranking is
+mapped onto the competition's own stage ladder, the keys of its
+COMPETITION_BASE_POINTS table from best to worst, by bracket size
+(STAGE_SLOTS: e.g. MLB has one World Series winner, one runner-up, two LCS
+and four LDS losers and four wild-card losers; everyone else lands in the
+last stage), and a team's points in a season are the base points of the
+stage it reached.
+
+The analytic model's generic stages (OPTIONB_DEFAULTS) are mapped onto the
+same ladder by name where the ladder has that stage and otherwise by depth,
+with its last, catch-all stage on the ladder's last stage, so the analytic
+and sampled columns score the same stages.
+``e_base`` is ncsrcp's own ``expected_base_points``, which looks the generic
+stage names up in COMPETITION_BASE_POINTS and scores any name the table
+does not have (MLB's ``ws_winner``, NHL's ``conf_finalist``, ...) as 0; its
+error column shows what that mismatch costs the draft.
+
+Seasons are simulated in blocks as batched array operations, sharded over
+processes with ``mc_parallel`` and reduced to per-team sums, per-team stage
+counts and per-drafter season totals (the sum of their teams' points).  The
+report compares the sampled mean points and stage frequencies of every team
+with ``expected_base_points`` / ``expand_pchamp_to_outcomes`` and summarizes
+the distribution of each drafter's total.
+
+Rosters are a CSV with ``drafter`` and ``team`` columns (team names as in
+the teams CSV).
+
+Usage:
+    python season_sim.py teams_tagged.csv --seasons 1000000
+    python season_sim.py teams_tagged.csv --rosters rosters.csv --seasons 1000000 --out calibration.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from mc_parallel import run_sharded
+from ncsrcp import (COMPETITION_BASE_POINTS, OPTIONB_DEFAULTS, competition_style, expand_pchamp_to_outcomes,
+                    expected_base_points, load_teams_from_csv, name_to_id)
+
+# Teams finishing in each stage of COMPETITION_BASE_POINTS[competition], in
+# the table's order; None takes every remaining team
+STAGE_SLOTS = {
+    "2025-26 NBA season": [1, 1, 2, 4, 8, 2, 2, None],
+    "2026 WNBA season": [1, 1, 2, 4, None],
+    "2025-26 NHL season": [1, 1, 2, 4, 8, None],
+    "2025-26 NFL season": [1, 1, 2, 4, 6, None],
+    "2026 MLB season": [1, 1, 2, 4, 4, None],
+    "2026 FIFA World Cup": [1, 1, 2, 4, 8, 16, 16, 6, None],
+    "2025-26 UEFA Champions League": [1, 1, 2, 4, 8, 8, None],
+    "2025-26 UEFA Women's Champions League": [1, 1, 2, 4, 4, None],
+    "2025-26 NCAA Division I men's basketball": [1, 1, 2, 4, 8, 16, 32, 4, None],
+    "2025-26 NCAA Division I women's basketball": [1, 1, 2, 4, 8, 16, 32, 4, None],
+    "2026 NCAA Division I baseball": [1, 1, 2, 2, 2, 8, 16, 16, 16, None],
+}
+N_STAGES = max(len(table) for table in COMPETITION_BASE_POINTS.values())
+BLOCK_SIZE = 20_000
+
+
+class Season:
+    """Teams, their competitions and per-rank stage points, as arrays."""
+
+    def __init__(self, teams):
+        self.team_ids = list(teams)
+        self.competitions = []
+        for tid in self.team_ids:
+            if teams[tid]["competition"] not in self.competitions:
+                self.competitions.append(teams[tid]["competition"])
+        self.competition = np.array([teams[tid]["competition"] for tid in self.team_ids])
+        p_champ = np.array([teams[tid]["p_champ"] for tid in self.team_ids], dtype=float)
+
+        self.p_norm = np.zeros(len(self.team_ids))
+        self.groups = []  # (team positions, p_norm, stage index by rank, base points by rank)
+        for comp in self.competitions:
+            if comp not in COMPETITION_BASE_POINTS or comp not in STAGE_SLOTS:
+                raise KeyError(f"No base points or stage slots for competition '{comp}'")
+            members = np.flatnonzero(self.competition == comp)
+            total = p_champ[members].sum()
+            if not total > 0:
+                # Every race key would be infinite and the ranking arbitrary
+                raise ValueError(f"Competition '{comp}' has no team with a positive champ_prob")
+            p = p_champ[members] / total
+            self.p_norm[members] = p
+
+            base = np.array(list(COMPETITION_BASE_POINTS[comp].values()))
+            slots = [len(members) if n is None else n for n in STAGE_SLOTS[comp]]
+            stage_by_rank = np.repeat(np.arange(len(base)), slots)[:len(members)]
+            stage_by_rank = np.pad(stage_by_rank, (0, len(members) - len(stage_by_rank)),
+                                   constant_values=len(base) - 1)
+            self.groups.append((members, p, stage_by_rank, base[stage_by_rank]))
+
+    @staticmethod
+    def ladder_index(competition):
+        """Position on the competition's stage ladder of each analytic (generic) stage."""
+        generic = OPTIONB_DEFAULTS[competition_style(competition)]["stages_ordered"]
+        names = list(COMPETITION_BASE_POINTS[competition])
+        last = len(names) - 1
+        index = {}
+        for i, stage in enumerate(generic):
+            if stage in names:
+                index[stage] = names.index(stage)
+            else:
+                index[stage] = last if i == len(generic) - 1 else min(i, last)
+        return index
+
+    def analytic(self):
+        """
+        Per-team analytic stage probabilities on each competition's ladder,
+        the expected points they give, and ncsrcp's ``expected_base_points``.
+        """
+        stage_probs = np.zeros((len(self.team_ids), N_STAGES))
+        e_base = np.zeros(len(self.team_ids))
+        points = np.zeros(len(self.team_ids))
+        for comp, (members, _, _, _) in zip(self.competitions, self.groups):
+            ladder = self.ladder_index(comp)
+            base = np.array(list(COMPETITION_BASE_POINTS[comp].values()))
+            for i in members:
+                outcomes = expand_pchamp_to_outcomes(self.p_norm[i], competition_style(comp))
+                for stage, prob in outcomes.items():
+                    stage_probs[i, ladder[stage]] += prob
+                points[i] = stage_probs[i, :len(base)] @ base
+                e_base[i] = expected_base_points(self.p_norm[i], comp)
+        return points, e_base, stage_probs
+
+
+def simulate_block(seed_seq, n_seasons, season, owners):
+    """
+    Sums over ``n_seasons`` seasons: per-team points and squared points,
+    per-team stage counts, and every drafter's total per season (``owners``
+    is a teams x drafters 0/1 matrix).
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_teams = len(season.team_ids)
+    points = np.zeros((n_seasons, n_teams))
+    stage_counts = np.zeros((n_teams, N_STAGES), dtype=np.int64)
+
+    for members, p, stage_by_rank, points_by_rank in season.groups:
+        # Plackett-Luce ranking as an exponential race: first finisher wins
+        with np.errstate(divide="ignore"):
+            keys = rng.standard_exponential((n_seasons, len(members))) / p
+        order = np.argsort(keys, axis=1)
+        team_points = np.empty((n_seasons, len(members)))
+        np.put_along_axis(team_points, order, points_by_rank[None, :], axis=1)
+        points[:, members] = team_points
+
+        # order[:, r] is the team ranked r, which finished in stage_by_rank[r]
+        counts = np.bincount((order * N_STAGES + stage_by_rank).ravel(), minlength=len(members) * N_STAGES)
+        stage_counts[members] += counts.reshape(len(members), N_STAGES)
+
+    return {
+        "sum": points.sum(axis=0),
+        "sumsq": np.square(points).sum(axis=0),
+        "stage_counts": stage_counts,
+        "drafter_totals": points @ owners,
+    }
+
+
+def simulate_seasons(season, owners, n_seasons, seed=None, workers=None, block_size=BLOCK_SIZE):
+    """Merge the blocks of ``n_seasons`` simulated seasons."""
+    blocks = run_sharded(simulate_block, n_seasons, seed=seed, block_size=block_size, workers=workers,
+                         season=season, owners=owners)
+    return {
+        "sum": sum(b["sum"] for b in blocks),
+        "sumsq": sum(b["sumsq"] for b in blocks),
+        "stage_counts": sum(b["stage_counts"] for b in blocks),
+        "drafter_totals": np.concatenate([b["drafter_totals"] for b in blocks]),
+    }
+
+
+def calibration(season, results, n_seasons):
+    """Per-team analytic vs sampled expected points and the largest stage-probability gap."""
+    analytic_points, e_base, stage_probs = season.analytic()
+    mean = results["sum"] / n_seasons
+    var = np.maximum(results["sumsq"] / n_seasons - mean ** 2, 0.0)
+    sampled_probs = results["stage_counts"] / n_seasons
+    return pd.DataFrame({
+        "team": season.team_ids,
+        "competition": season.competition,
+        "p_champ": season.p_norm,
+        "analytic_points": analytic_points,
+        "e_base": e_base,
+        "sampled_points": mean,
+        "std_error": np.sqrt(var / n_seasons),
+        "error": analytic_points - mean,
+        "e_base_error": e_base - mean,
+        "max_stage_prob_error": np.abs(stage_probs - sampled_probs).max(axis=1),
+    })
+
+
+def load_rosters(path, teams):
+    """Drafter -> team ids from a CSV with ``drafter`` and ``team`` columns."""
+    table = pd.read_csv(path)
+    missing = {"drafter", "team"} - set(table.columns)
+    if missing:
+        sys.exit(f"Error: {path} needs the column(s) {', '.join(sorted(missing))}")
+    rosters = {}
+    for drafter, team in zip(table["drafter"].astype(str), table["team"].astype(str)):
+        try:
+            rosters.setdefault(drafter, []).append(name_to_id(teams, team.strip()))
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+    return rosters
+
+
+def drafter_summary(drafters, totals, expected):
+    """Distribution of every drafter's season total, and how often each finishes first."""
+    winners = np.bincount(np.argmax(totals, axis=1), minlength=len(drafters))
+    return pd.DataFrame({
+        "analytic_total": expected,
+        "mean": totals.mean(axis=0),
+        "std": totals.std(axis=0),
+        "p05": np.percentile(totals, 5, axis=0),
+        "p50": np.percentile(totals, 50, axis=0),
+        "p95": np.percentile(totals, 95, axis=0),
+        "p_first": winners / len(totals),
+    }, index=pd.Index(drafters, name="drafter"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate seasons from champion probabilities and check the analytic expected points.",
+        epilog="Example:  python season_sim.py teams_tagged.csv --rosters rosters.csv --seasons 1000000",
+    )
+    parser.add_argument("teams_csv", help="CSV with team, competition and champ_prob columns")
+    parser.add_argument("--rosters", help="CSV with drafter and team columns")
+    parser.add_argument("--seasons", type=int, default=1_000_000, help="Seasons to simulate (default: 1,000,000)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=15, help="Worst-calibrated teams to show (default: 15)")
+    parser.add_argument("--out", help="Write the per-team calibration table to this CSV file")
+    args = parser.parse_args()
+
+    teams = load_teams_from_csv(args.teams_csv)
+    try:
+        season = Season(teams)
+    except (KeyError, ValueError) as e:
+        sys.exit(f"Error: {e.args[0]}")
+    rosters = load_rosters(args.rosters, teams) if args.rosters else {}
+    drafters = list(rosters)
+    position = {tid: i for i, tid in enumerate(season.team_ids)}
+    owners = np.zeros((len(season.team_ids), len(drafters)))
+    for j, drafter in enumerate(drafters):
+        owners[[position[tid] for tid in rosters[drafter]], j] = 1.0
+
+    print(f"Simulating {args.seasons:,} seasons of {len(season.competitions)} competitions ...")
+    results = simulate_seasons(season, owners, args.seasons, seed=args.seed, workers=args.workers)
+    table = calibration(season, results, args.seasons)
+
+    print("\nCalibration of expected base points (analytic - sampled) by competition:")
+    summary = table.groupby("competition", sort=False).agg(
+        mean_abs_error=("error", lambda e: e.abs().mean()),
+        rmse=("error", lambda e: np.sqrt(np.square(e).mean())),
+        bias=("error", "mean"),
+        e_base_bias=("e_base_error", "mean"),
+        max_stage_prob_error=("max_stage_prob_error", "max"),
+    )
+    with pd.option_context("display.width", 200, "display.float_format", "{:,.3f}".format):
+        print(summary.to_string())
+        worst = table.reindex(table["error"].abs().sort_values(ascending=False).index).head(args.top)
+        print("\nLargest team-level errors:")
+        print(worst[["team", "competition", "p_champ", "analytic_points", "e_base", "sampled_points",
+                     "std_error", "error"]].to_string(index=False))
+
+        if drafters:
+            expected = table["analytic_points"].to_numpy() @ owners
+            print("\nSeason totals by drafter:")
+            print(drafter_summary(drafters, results["drafter_totals"], expected).to_string())
+
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"\nCalibration table saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from season_sim import Season, simulate_seasons
+
+WNBA = "2026 WNBA season"
+MLB = "2026 MLB season"
+
+
+def teams(probs_by_comp):
+    return {f"{comp[:8]}_{i}": {"name": f"{comp[:8]}_{i}", "competition": comp, "p_champ": p}
+            for comp, probs in probs_by_comp.items() for i, p in enumerate(probs)}
+
+
+def test_champion_frequencies_match_normalized_p_champ():
+    season = Season(teams({WNBA: [0.5, 0.3, 0.1, 0.1, 0.0, 0.0], MLB: [2.0, 1.0, 1.0]}))
+    n = 40_000
+    owners = np.zeros((len(season.team_ids), 0))
+
+    results = simulate_seasons(season, owners, n, seed=0, workers=1)
+
+    champ_freq = results["stage_counts"][:, 0] / n
+    std_error = np.sqrt(season.p_norm * (1 - season.p_norm) / n)
+    assert np.all(np.abs(champ_freq - season.p_norm) <= 4 * std_error + 1e-12)
+    # exactly one champion per competition per season
+    assert results["stage_counts"][:, 0].sum() == 2 * n
+
+
+def test_rejects_a_competition_without_positive_champ_prob():
+    with pytest.raises(ValueError, match="positive champ_prob"):
+        Season(teams({WNBA: [0.5, 0.5], MLB: [0.0, 0.0]}))
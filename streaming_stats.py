@@ -0,0 +1,176 @@
+"""
+Streaming, mergeable summary statistics for Monte Carlo results
+
+``StreamingStats`` consumes values in batches and never stores them.  It keeps
+a running count/mean/M2 (Welford's update, merged across batches with Chan's
+formula), the exact minimum and maximum, and a fixed-bin log-spaced histogram
+that answers percentile queries and feeds histogram plots.  Two instances with
+the same bin layout can be merged, so chunks and worker processes can each
+build their own and combine them at the end without shipping raw arrays.
+
+Percentiles are accurate to within one histogram bin: with the default 1000
+bins per decade that is a relative error below 0.25%.  Values below ``lo``
+(including zeros) and above ``hi`` are counted in underflow/overflow buckets
+and interpolated against the exact min/max.
+
+Usage:
+    from streaming_stats import StreamingStats
+    stats = StreamingStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    stats.merge(other_stats)
+    stats.percentiles([5, 50, 95])
+"""
+
+import numpy as np
+
+
+class StreamingStats:
+    def __init__(self, lo: float = 1e-2, hi: float = 1e12, bins_per_decade: int = 1000):
+        if not 0 < lo < hi:
+            raise ValueError("need 0 < lo < hi")
+        self.lo = lo
+        self.hi = hi
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = int(np.ceil(np.log10(hi / lo) * bins_per_decade))
+
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.underflow = 0
+        self.overflow = 0
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+
+    # ── Feeding and merging ──
+
+    def update(self, values) -> "StreamingStats":
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return self
+
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+        self._combine(values.size, batch_mean, batch_m2)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        below = values < self.lo
+        above = values >= self.hi
+        self.underflow += int(below.sum())
+        self.overflow += int(above.sum())
+        inside = values[~(below | above)]
+        idx = np.floor(np.log10(inside / self.lo) * self.bins_per_decade).astype(np.int64)
+        np.minimum(idx, self.n_bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.n_bins)
+        return self
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """Fold another accumulator with the same bin layout into this one."""
+        if (self.lo, self.hi, self.bins_per_decade) != (other.lo, other.hi, other.bins_per_decade):
+            raise ValueError("cannot merge StreamingStats with different bin layouts")
+        if other.count == 0:
+            return self
+
+        self._combine(other.count, other._mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.counts += other.counts
+        return self
+
+    def _combine(self, n: int, mean: float, m2: float):
+        total = self.count + n
+        delta = mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    # ── Moments ──
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.count else np.nan
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, as ``np.var``)."""
+        return self._m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self.variance)
+
+    @property
+    def median(self) -> float:
+        return self.percentiles([50])[0]
+
+    # ── Percentiles and histograms ──
+
+    def bin_edges(self) -> np.ndarray:
+        """Edges of the log-spaced bins (``n_bins + 1`` values from ``lo``)."""
+        return self.lo * 10.0 ** (np.arange(self.n_bins + 1) / self.bins_per_decade)
+
+    def percentiles(self, q) -> np.ndarray:
+        """Approximate percentiles, ``q`` in [0, 100] (scalar or sequence)."""
+        if self.count == 0:
+            raise ValueError("no values have been added")
+        q = np.atleast_1d(np.asarray(q, dtype=float)) / 100
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError("percentiles must be in [0, 100]")
+
+        # Bucket sequence: underflow, log bins, overflow
+        edges = self.bin_edges()
+        lower = np.concatenate([[self.min], edges[:-1], [self.hi]])
+        upper = np.concatenate([[self.lo], edges[1:], [self.max]])
+        counts = np.concatenate([[self.underflow], self.counts, [self.overflow]])
+        cum = np.cumsum(counts)
+
+        target = q * self.count
+        bucket = np.minimum(np.searchsorted(cum, target, side="left"), counts.size - 1)
+        before = np.where(bucket > 0, cum[bucket - 1], 0)
+        frac = np.divide(target - before, counts[bucket],
+                         out=np.zeros_like(target), where=counts[bucket] > 0)
+
+        lo_b = np.maximum(lower[bucket], self.min)
+        hi_b = np.minimum(upper[bucket], self.max)
+        geometric = (bucket > 0) & (bucket < counts.size - 1) & (lo_b > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(geometric,
+                              lo_b * (hi_b / lo_b) ** frac,
+                              lo_b + (hi_b - lo_b) * frac)
+        return np.clip(values, self.min, self.max)
+
+    def summary(self, percentiles=range(5, 100, 5)) -> dict:
+        """Mean, median, standard deviation and percentiles, as ``mc_engine.summarize``."""
+        percentiles = list(percentiles)
+        return {
+            "mean": self.mean,
+            "median": self.median,
+            "std": self.std,
+            "percentiles": dict(zip(percentiles, self.percentiles(percentiles))),
+        }
+
+    def histogram(self, bins: int = 50, range=None, log: bool = False):
+        """
+        Re-bin the sketch into ``bins`` linear (or log-spaced) bins over
+        ``range`` (default: min..max).  Returns ``(counts, edges)`` like
+        ``np.histogram``; plot with ``plt.stairs(counts, edges)``.
+        """
+        x_min, x_max = range if range is not None else (self.min, self.max)
+        if log:
+            x_min = max(x_min, self.lo)
+            edges = np.geomspace(x_min, x_max, bins + 1)
+        else:
+            edges = np.linspace(x_min, x_max, bins + 1)
+
+        log_edges = self.bin_edges()
+        centers = np.concatenate([[max(self.min, 0.0)],
+                                  np.sqrt(log_edges[:-1] * log_edges[1:]),
+                                  [self.max]])
+        weights = np.concatenate([[self.underflow], self.counts, [self.overflow]])
+        counts, _ = np.histogram(centers, bins=edges, weights=weights)
+        return counts.astype(np.int64), edges
@@ -0,0 +1,187 @@
+"""
+Universe-level betas and correlations
+
+Computes betas against a benchmark and the full correlation matrix for a
+whole list of tickers with a handful of matrix products, instead of one
+regression or one pairwise download per name.  Prices for the universe come
+from one batched ``market_data`` fetch.
+
+Tickers with different histories are handled pairwise-complete: every
+statistic for a pair (or for a ticker against the benchmark) uses exactly
+the dates on which both have returns, which is what
+``DataFrame.corr()`` / ``cov()`` do one pair at a time.  Using the
+missing-value mask as a matrix, all pairwise counts, sums and cross-products
+come out of three matrix products.  Pairwise-complete matrices need not be
+positive semi-definite, so ``--shrinkage`` can pull the correlations toward
+their average (constant-correlation target).
+
+Usage:
+    python universe.py VTI VXUS AAPL MSFT --benchmark VT --start 2020-01-01
+    python universe.py --holdings vt.json --top 200 --shrinkage 0.2 --corr-out corr.csv --betas-out betas.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from holdings import load_holdings
+from market_data import get_prices
+
+
+def load_holdings_tickers(path: str, top: int = None) -> list[str]:
+    """Tickers of the holdings in a fund holdings file (e.g. vt.json), largest weight first."""
+    frame = load_holdings(path).frame.sort_values("weighting", ascending=False)
+    tickers = list(dict.fromkeys(t for t in frame["ticker"] if t))
+    return tickers[:top] if top else tickers
+
+
+def column_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Simple returns of each column over its own trading dates, so a holiday
+    in one market does not blank out the next return of another.
+    """
+    return prices.apply(lambda p: p.dropna().pct_change()).iloc[1:]
+
+
+def _pairwise_moments(returns: pd.DataFrame):
+    """Pairwise-complete counts and centered (co)variance sums of every column pair."""
+    values = returns.to_numpy(dtype=float)
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0.0)
+    m = mask.astype(float)
+
+    n = m.T @ m                      # n[i, j]: dates where both i and j have returns
+    sums = x.T @ m                   # sums[i, j]: sum of i over those dates
+    squares = (x * x).T @ m          # sum of i**2 over those dates
+    cross = x.T @ x                  # sum of i * j over those dates
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov_sum = cross - sums * sums.T / n
+        var_sum = squares - sums**2 / n
+    return n, cov_sum, var_sum
+
+
+def pairwise_covariance(returns: pd.DataFrame, min_periods: int = 2) -> pd.DataFrame:
+    """Pairwise-complete sample covariance matrix (NaN where fewer than ``min_periods`` dates overlap)."""
+    n, cov_sum, _ = _pairwise_moments(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = cov_sum / (n - 1)
+    cov[n < max(min_periods, 2)] = np.nan
+    return pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
+
+
+def pairwise_correlation(returns: pd.DataFrame, min_periods: int = 2) -> pd.DataFrame:
+    """Pairwise-complete correlation matrix, matching ``returns.corr(min_periods=...)``."""
+    n, cov_sum, var_sum = _pairwise_moments(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov_sum / np.sqrt(var_sum * var_sum.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[n < max(min_periods, 2)] = np.nan
+    return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+
+def shrink_correlation(corr: pd.DataFrame, shrinkage: float) -> pd.DataFrame:
+    """
+    Blend a correlation matrix with the constant-correlation target (every
+    off-diagonal entry equal to the average correlation).  Missing pairs
+    take the target value.
+    """
+    if not 0 <= shrinkage <= 1:
+        raise ValueError("shrinkage must be in [0, 1]")
+    values = corr.to_numpy(dtype=float)
+    off_diagonal = ~np.eye(len(values), dtype=bool)
+    target = np.nanmean(values[off_diagonal]) if off_diagonal.any() else 0.0
+
+    shrunk = (1 - shrinkage) * values + shrinkage * target
+    shrunk = np.where(np.isnan(values), target, shrunk)
+    np.fill_diagonal(shrunk, 1.0)
+    return pd.DataFrame(shrunk, index=corr.index, columns=corr.columns)
+
+
+def universe_betas(returns: pd.DataFrame, benchmark: pd.Series, min_periods: int = 2) -> pd.DataFrame:
+    """
+    Beta (cov / var of the benchmark), correlation and observation count of
+    every column against ``benchmark``, pairwise-complete, in one pass.
+    """
+    values = returns.to_numpy(dtype=float)
+    bench = benchmark.reindex(returns.index).to_numpy(dtype=float)
+    mask = ~np.isnan(values) & ~np.isnan(bench)[:, None]
+    m = mask.astype(float)
+    x = np.where(mask, values, 0.0)
+    b = np.where(mask, bench[:, None], 0.0)
+
+    n = m.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean, b_mean = x.sum(axis=0) / n, b.sum(axis=0) / n
+        cov = (x * b).sum(axis=0) - n * x_mean * b_mean
+        var_b = (b * b).sum(axis=0) - n * b_mean**2
+        var_x = (x * x).sum(axis=0) - n * x_mean**2
+        beta = cov / var_b
+        corr = cov / np.sqrt(var_b * var_x)
+
+    result = pd.DataFrame({"beta": beta, "correlation": corr, "n_obs": n.astype(int)}, index=returns.columns)
+    result.loc[result["n_obs"] < max(min_periods, 2), ["beta", "correlation"]] = np.nan
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Betas against a benchmark and the full correlation matrix for a universe of tickers.",
+        epilog="Example:  python universe.py VTI VXUS AAPL --benchmark VT --start 2020-01-01",
+    )
+    parser.add_argument("tickers", nargs="*", help="Tickers to analyse")
+    parser.add_argument("--holdings", help="Take the tickers from a fund holdings file (e.g. vt.json)")
+    parser.add_argument("--top", type=int, help="Only the TOP largest holdings from --holdings")
+    parser.add_argument("--benchmark", default="VT", help="Benchmark for betas (default: VT)")
+    parser.add_argument("--start", default="2020-01-01", help="Start date (default: 2020-01-01)")
+    parser.add_argument("--end", default=None, help="End date (default: today)")
+    parser.add_argument("--min-periods", type=int, default=60,
+                        help="Minimum overlapping returns for a beta/correlation (default: 60)")
+    parser.add_argument("--shrinkage", type=float, default=0.0,
+                        help="Shrink correlations toward their average by this weight, 0-1 (default: 0)")
+    parser.add_argument("--betas-out", help="Write betas to this CSV file")
+    parser.add_argument("--corr-out", help="Write the correlation matrix to this CSV file")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.holdings:
+        tickers += load_holdings_tickers(args.holdings, args.top)
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        sys.exit("Error: give tickers or --holdings FILE")
+
+    print(f"Loading prices for {len(tickers)} tickers + {args.benchmark} ...")
+    prices = get_prices(list(dict.fromkeys(tickers + [args.benchmark])), start=args.start, end=args.end)
+    if args.benchmark not in prices.columns:
+        sys.exit(f"Error: no price data for benchmark {args.benchmark}")
+    returns = column_returns(prices)
+    missing = [t for t in tickers if t not in returns.columns or returns[t].isna().all()]
+    if missing:
+        print(f"Warning: no price data for {len(missing)} ticker(s): {', '.join(missing[:20])}"
+              + (" ..." if len(missing) > 20 else ""), file=sys.stderr)
+    tickers = [t for t in tickers if t not in missing]
+
+    betas = universe_betas(returns[tickers], returns[args.benchmark], args.min_periods)
+    corr = pairwise_correlation(returns[tickers], args.min_periods)
+    if args.shrinkage:
+        corr = shrink_correlation(corr, args.shrinkage)
+
+    with pd.option_context("display.max_rows", 50, "display.width", 200, "display.float_format", "{:,.3f}".format):
+        print(f"\nBetas relative to {args.benchmark}:")
+        print(betas.to_string() if len(betas) <= 50 else betas.describe().to_string())
+        if len(corr) <= 12:
+            print("\nCorrelation matrix:")
+            print(corr.to_string())
+
+    if args.betas_out:
+        betas.to_csv(args.betas_out)
+        print(f"\nBetas saved to {args.betas_out}")
+    if args.corr_out:
+        corr.to_csv(args.corr_out)
+        print(f"Correlation matrix saved to {args.corr_out}")
+
+
+if __name__ == "__main__":
+    main()
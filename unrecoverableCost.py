@@ -1,51 +1,113 @@
+"""
+Unrecoverable cost of owning a home
+
+The annual unrecoverable cost of a home is its average weighted cost of
+capital (equity at the opportunity cost of investing in stocks instead of
+real estate, debt at the mortgage rate plus PMI while the loan-to-value is
+above 80%) plus property tax, HOA/maintenance and insurance, with closing
+costs and total PMI spread over the mortgage term.  It is the break-even
+annual rent.
+
+The amortization is evaluated in closed form: the principal remaining
+after k payments is M (g^N - g^k) / (g^N - 1) with g = 1 + monthly rate,
+the PMI cutoff month solves that for LTV = 80%, and the month-by-month
+WACC sums are geometric series.  Every function broadcasts over NumPy
+arrays, so many down-payment percentages (or whole scenario grids) are
+evaluated at once.
+"""
+
+import numpy as np
 from scipy.optimize import minimize_scalar
 
-def wacc_with_pmi(price_of_home, down_payment_percent, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent=0, pmi_rate=0):
-    down_payment = price_of_home * down_payment_percent
-    closing_costs = price_of_home * closing_cost_percent
-    mortgage = price_of_home - down_payment
-    monthly_rate = cost_of_debt / 12
-    num_payments = mortgage_term_years * 12
+PMI_LTV = 0.80
+CUTOFF_TOL = 1e-9  # months; an LTV within rounding of 80% counts as at 80% (no PMI)
+
+
+def _scalar_or_array(value):
+    value = np.asarray(value, dtype=float)
+    return value.item() if value.ndim == 0 else value
 
-    # Monthly mortgage payment (excluding PMI)
-    monthly_payment = (mortgage * monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
 
-    total_wacc = 0
-    pmi_total = 0
-    remaining_principal = mortgage
+def remaining_principal(mortgage, monthly_rate, num_payments, k):
+    """Principal left after ``k`` payments of a level-payment mortgage (broadcasts)."""
+    mortgage, r, n, k = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (mortgage, monthly_rate, num_payments, k)))
+    safe_r = np.where(r == 0, 1.0, r)
+    growth_n = (1 + safe_r) ** n
+    amortizing = mortgage * (growth_n - (1 + safe_r) ** k) / (growth_n - 1)
+    return np.where(r == 0, mortgage * (1 - k / n), amortizing)
 
-    for year in range(mortgage_term_years):
-        for month in range(12):
-            # Step 1: Calculate LTV before payment
-            ltv = remaining_principal / price_of_home
-            equity = price_of_home - remaining_principal
 
-            # Step 2: Check if PMI applies
-            if ltv > 0.80:
-                monthly_pmi = mortgage * pmi_rate / 12
-                pmi_total += monthly_pmi
-                effective_cost_of_debt = cost_of_debt + pmi_rate
-            else:
-                monthly_pmi = 0
-                effective_cost_of_debt = cost_of_debt
+def pmi_cutoff_month(mortgage, monthly_rate, num_payments, price_of_home, ltv=PMI_LTV):
+    """
+    Number of months PMI is charged: the first month whose opening balance
+    is at most ``ltv`` of the price (0 if it starts there, N if never).
+    """
+    mortgage, r, n, price = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (mortgage, monthly_rate, num_payments, price_of_home)))
+    limit = ltv * price
+    safe_r = np.where(r == 0, 1.0, r)
+    safe_mortgage = np.where(mortgage > 0, mortgage, 1.0)
+    growth_n = (1 + safe_r) ** n
 
-            # Step 3: Compute monthly interest and principal
-            interest_payment = remaining_principal * monthly_rate
-            principal_payment = monthly_payment - interest_payment
-            remaining_principal -= principal_payment
+    # Solve P_k = limit for k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        arg = growth_n - limit * (growth_n - 1) / safe_mortgage
+        k_amortizing = np.log(np.where(arg > 0, arg, 1.0)) / np.log1p(safe_r)
+    k_linear = n * (1 - limit / safe_mortgage)
+    k = np.where(r == 0, k_linear, k_amortizing)
+
+    months = np.clip(np.ceil(k - CUTOFF_TOL), 0, n)
+    return np.where(mortgage > limit, months, 0.0)
+
+
+def wacc_with_pmi(price_of_home, down_payment_percent, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent=0, pmi_rate=0):
+    """
+    Average monthly WACC over the term, total PMI paid, closing costs and
+    the monthly payment (excluding PMI).  Each month's WACC weights the
+    balance after that month's payment at the cost of debt (plus PMI while
+    the opening LTV is above 80%) and the opening equity at the cost of
+    equity.  Arguments broadcast, e.g. a column of down payments against a
+    row of rates gives 2-D results.
+    """
+    price, dp, coe, cod, years, closing_pct, pmi = (
+        np.asarray(v, dtype=float) for v in
+        (price_of_home, down_payment_percent, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent, pmi_rate)
+    )
+    mortgage = price - price * dp
+    closing_costs = price * closing_pct
+    r = cod / 12
+    n = years * 12
+
+    safe_r = np.where(r == 0, 1.0, r)
+    g = 1 + safe_r
+    growth_n = g ** n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_payment = np.where(r == 0, mortgage / n, mortgage * safe_r * growth_n / (growth_n - 1))
+
+    k = pmi_cutoff_month(mortgage, r, n, price)
+
+    # Geometric sums of the balance: opening balances P_0..P_{N-1},
+    # closing balances P_1..P_N and the closing balances of the PMI months P_1..P_k
+    scale = mortgage / (growth_n - 1)
+    opening_sum = np.where(r == 0, mortgage * (n + 1) / 2, scale * (n * growth_n - (growth_n - 1) / safe_r))
+    closing_sum = np.where(r == 0, mortgage * (n - 1) / 2, scale * (n * growth_n - g * (growth_n - 1) / safe_r))
+    pmi_closing_sum = np.where(
+        r == 0,
+        mortgage * (k - k * (k + 1) / (2 * n)),
+        scale * (k * growth_n - g * (g**k - 1) / safe_r),
+    )
 
-            # Step 4: Compute WACC for this month
-            debt_weight = remaining_principal / price_of_home
-            equity_weight = equity / price_of_home
-            monthly_wacc = debt_weight * effective_cost_of_debt + equity_weight * cost_of_equity
-            total_wacc += monthly_wacc
+    total_wacc = (cod * closing_sum + pmi * pmi_closing_sum + coe * (n * price - opening_sum)) / price
+    average_wacc = total_wacc / n
+    pmi_total = k * mortgage * pmi / 12
 
-    average_wacc = total_wacc / (mortgage_term_years * 12)
-    return average_wacc, pmi_total, closing_costs, monthly_payment
+    return (_scalar_or_array(average_wacc), _scalar_or_array(pmi_total),
+            _scalar_or_array(closing_costs), _scalar_or_array(monthly_payment))
 
 
 
 def unrecoverable_cost_given_down_payment(down_payment_percent, *args):
+    # Broadcasts like wacc_with_pmi, so a whole array of down payments costs one call
     price_of_home, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent, pmi_rate, property_tax, hoa, insurance = args
 
     avg_wacc, pmi_total, closing_costs, _ = wacc_with_pmi(
@@ -65,80 +127,94 @@ def unrecoverable_cost_given_down_payment(down_payment_percent, *args):
     return unrecoverable_cost
 
 def find_optimal_down_payment_percent(price_of_home, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent, pmi_rate, property_tax, hoa, insurance):
+    # PMI makes the cost jump at the 20% down-payment mark, so start from the
+    # best point of a vectorized grid and refine within its neighbouring cells
+    args = (price_of_home, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent, pmi_rate, property_tax, hoa, insurance)
+    grid = np.linspace(0.0, 1.0, 201)
+    costs = unrecoverable_cost_given_down_payment(grid, *args)
+    best = int(np.argmin(costs))
     result = minimize_scalar(
         unrecoverable_cost_given_down_payment,
-        bounds=(0.0, 1.0),
+        bounds=(grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)]),
         method='bounded',
-        args=(price_of_home, cost_of_equity, cost_of_debt, mortgage_term_years, closing_cost_percent, pmi_rate, property_tax, hoa, insurance)
+        args=args
     )
-    
+    if costs[best] < result.fun:
+        return grid[best], costs[best]
     return result.x, result.fun  # optimal down payment %, minimum unrecoverable cost
-# Inputs
-price_of_home = float(input("Enter the price of the home: "))
-down_payment_percent = float(input("Enter the down payment percentage: "))
-mortgage_term_years = int(input("Enter the mortgage term years: "))
-cost_of_debt = float(input("Enter the mortgage interest rate: "))
-property_tax = float(input("Enter the property tax: "))
-hoa = float(input("Enter the HOA/Maintenance rate: "))
-insurance = float(input("Enter the insurance rate: "))
-pmi_rate = float(input("Enter the private mortgage insurance rate: "))
-pe = float(input("Enter the CAPE ratio: "))
-target_pe = float(input("Enter the Target CAPE ratio: "))
-valuation_change = (target_pe / pe) ** (1 / 10) - 1
-earnings_growth = float(input("Enter the expected earnings growth: "))
-expected_return_real_estate = float(input("Enter the expected return of real estate: "))
-expected_return_stocks = (1 / pe) + earnings_growth + valuation_change
-cost_of_equity = expected_return_stocks - expected_return_real_estate
-closing_cost_percent = float(input("Enter the closing cost percentage: ")) # 3% closing costs
-
-# Run WACC calculation
-average_cost_of_capital, pmi_total, closing_costs, monthly_payment = wacc_with_pmi(
-    price_of_home,
-    down_payment_percent,
-    cost_of_equity,
-    cost_of_debt,
-    mortgage_term_years,
-    closing_cost_percent,
-    pmi_rate
-)
-
-down_payment = price_of_home * down_payment_percent
-capital_invested = down_payment + closing_costs
-unrecoverable_cost = (average_cost_of_capital + property_tax + hoa + insurance) * price_of_home + (closing_costs / mortgage_term_years)
-rent = unrecoverable_cost
-
-optimal_dp_percent, min_unrec_cost = find_optimal_down_payment_percent(
-    price_of_home,
-    cost_of_equity,
-    cost_of_debt,
-    mortgage_term_years,
-    closing_cost_percent,
-    pmi_rate,
-    property_tax,
-    hoa,
-    insurance
-)
-
-# Outputs
-print(f"\nMonthly Payment: ${monthly_payment:,.2f}")
-print(f"\nDown Payment: ${down_payment:,.2f}")
-print(f"Closing Costs: ${closing_costs:,.2f}")
-print(f"Capital Invested: ${capital_invested:,.2f}")
-print(f"Cost of Debt: {cost_of_debt * 100:.2f}%")
-print(f"Cost of Equity: {cost_of_equity * 100:.2f}%")
-print(f"Total PMI Paid: ${pmi_total:,.2f}")
-print(f"Annual Required Home Savings: ${(property_tax + hoa + insurance) * price_of_home:,.2f}")
-print(f"Monthly Required Home Savings: ${((property_tax + hoa + insurance) * price_of_home) / 12:,.2f}")
-print(f"Annual Unrecoverable Costs: ${unrecoverable_cost:,.2f}")
-print(f"Monthly Unrecoverable Costs: ${unrecoverable_cost / 12:,.2f}")
-print(f"Annual Income Needed: ${unrecoverable_cost / 0.3:,.2f}")
-
-# Recalculate home price based on rent
-price_of_home_estimate = (rent - (closing_costs / mortgage_term_years)) / (average_cost_of_capital + property_tax + hoa + insurance)
-print(f"\nAnnual Rent: ${rent:,.2f}")
-print(f"Monthly Rent: ${rent / 12:,.2f}")
-print(f"Estimated Value of Home: ${price_of_home_estimate:,.2f}")
-
-print(f"\nOptimal Down Payment %: {optimal_dp_percent * 100:.2f}%")
-print(f"Minimum Annual Unrecoverable Cost: ${min_unrec_cost:,.2f}")
-print(f"Minimum Monthly Unrecoverable Cost: ${min_unrec_cost/12:,.2f}\n")
+
+
+def main():
+    # Inputs
+    price_of_home = float(input("Enter the price of the home: "))
+    down_payment_percent = float(input("Enter the down payment percentage: "))
+    mortgage_term_years = int(input("Enter the mortgage term years: "))
+    cost_of_debt = float(input("Enter the mortgage interest rate: "))
+    property_tax = float(input("Enter the property tax: "))
+    hoa = float(input("Enter the HOA/Maintenance rate: "))
+    insurance = float(input("Enter the insurance rate: "))
+    pmi_rate = float(input("Enter the private mortgage insurance rate: "))
+    pe = float(input("Enter the CAPE ratio: "))
+    target_pe = float(input("Enter the Target CAPE ratio: "))
+    valuation_change = (target_pe / pe) ** (1 / 10) - 1
+    earnings_growth = float(input("Enter the expected earnings growth: "))
+    expected_return_real_estate = float(input("Enter the expected return of real estate: "))
+    expected_return_stocks = (1 / pe) + earnings_growth + valuation_change
+    cost_of_equity = expected_return_stocks - expected_return_real_estate
+    closing_cost_percent = float(input("Enter the closing cost percentage: ")) # 3% closing costs
+
+    # Run WACC calculation
+    average_cost_of_capital, pmi_total, closing_costs, monthly_payment = wacc_with_pmi(
+        price_of_home,
+        down_payment_percent,
+        cost_of_equity,
+        cost_of_debt,
+        mortgage_term_years,
+        closing_cost_percent,
+        pmi_rate
+    )
+
+    down_payment = price_of_home * down_payment_percent
+    capital_invested = down_payment + closing_costs
+    unrecoverable_cost = (average_cost_of_capital + property_tax + hoa + insurance) * price_of_home + (closing_costs / mortgage_term_years)
+    rent = unrecoverable_cost
+
+    optimal_dp_percent, min_unrec_cost = find_optimal_down_payment_percent(
+        price_of_home,
+        cost_of_equity,
+        cost_of_debt,
+        mortgage_term_years,
+        closing_cost_percent,
+        pmi_rate,
+        property_tax,
+        hoa,
+        insurance
+    )
+
+    # Outputs
+    print(f"\nMonthly Payment: ${monthly_payment:,.2f}")
+    print(f"\nDown Payment: ${down_payment:,.2f}")
+    print(f"Closing Costs: ${closing_costs:,.2f}")
+    print(f"Capital Invested: ${capital_invested:,.2f}")
+    print(f"Cost of Debt: {cost_of_debt * 100:.2f}%")
+    print(f"Cost of Equity: {cost_of_equity * 100:.2f}%")
+    print(f"Total PMI Paid: ${pmi_total:,.2f}")
+    print(f"Annual Required Home Savings: ${(property_tax + hoa + insurance) * price_of_home:,.2f}")
+    print(f"Monthly Required Home Savings: ${((property_tax + hoa + insurance) * price_of_home) / 12:,.2f}")
+    print(f"Annual Unrecoverable Costs: ${unrecoverable_cost:,.2f}")
+    print(f"Monthly Unrecoverable Costs: ${unrecoverable_cost / 12:,.2f}")
+    print(f"Annual Income Needed: ${unrecoverable_cost / 0.3:,.2f}")
+
+    # Recalculate home price based on rent
+    price_of_home_estimate = (rent - (closing_costs / mortgage_term_years)) / (average_cost_of_capital + property_tax + hoa + insurance)
+    print(f"\nAnnual Rent: ${rent:,.2f}")
+    print(f"Monthly Rent: ${rent / 12:,.2f}")
+    print(f"Estimated Value of Home: ${price_of_home_estimate:,.2f}")
+
+    print(f"\nOptimal Down Payment %: {optimal_dp_percent * 100:.2f}%")
+    print(f"Minimum Annual Unrecoverable Cost: ${min_unrec_cost:,.2f}")
+    print(f"Minimum Monthly Unrecoverable Cost: ${min_unrec_cost/12:,.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
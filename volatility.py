@@ -1,11 +1,12 @@
-import yfinance as yf
 import numpy as np
 
+from market_data import get_prices
+
 # Choose stock ticker symbol (e.g., 'AAPL' for Apple)
 ticker = 'VT'
 
 # Download historical data for the stock (adjusted close prices)
-stock_data = yf.download(ticker, period="1y", interval="1d")  # 1 year of daily data
+stock_data = get_prices(ticker, period="1y", interval="1d").rename(columns={ticker: "Close"})  # 1 year of daily data
 
 # Calculate daily returns
 stock_data['Daily Returns'] = stock_data['Close'].pct_change()